@@ -1,20 +1,95 @@
+import copy
+import collections
+import functools
+import hashlib
+import html
+import importlib
+import io
+import itertools
+import json
+import mmap
+import os
+import pickle
+import platform
+import random
 import re
+import shutil
+import subprocess
+import sys
 import tempfile
+import time
+import unicodedata
+import tracemalloc
+import zipfile
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from datetime import datetime
-from typing import Optional
-from enum import Enum, auto
+from typing import ClassVar, Iterable, Iterator, Optional
+from enum import Enum, IntFlag, auto
+
+try:
+    import resource
+except ImportError:
+    resource = None
 
 import typer
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
-from pptx import Presentation
-from pptx.util import Inches, Pt
-from pptx.dml.color import RGBColor
-from pptx.enum.text import PP_ALIGN
-from pptx.enum.shapes import MSO_SHAPE
-from PIL import Image as PILImage
+from rich.table import Table
+
+
+class _LazyImport:
+    def __init__(self, module: str, name: Optional[str] = None):
+        self._module = module
+        self._name = name
+        self._target = None
+
+    def _resolve(self):
+        if self._target is None:
+            module = importlib.import_module(self._module)
+            self._target = getattr(module, self._name) if self._name else module
+        return self._target
+
+    def __getattr__(self, attr: str):
+        return getattr(self._resolve(), attr)
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+
+# The rendering stack takes a few hundred milliseconds to import, so it only
+# loads once something renders. preview and --help never touch it.
+etree = _LazyImport("lxml.etree")
+Presentation = _LazyImport("pptx", "Presentation")
+Inches = _LazyImport("pptx.util", "Inches")
+Pt = _LazyImport("pptx.util", "Pt")
+RGBColor = _LazyImport("pptx.dml.color", "RGBColor")
+PP_ALIGN = _LazyImport("pptx.enum.text", "PP_ALIGN")
+MSO_SHAPE = _LazyImport("pptx.enum.shapes", "MSO_SHAPE")
+CT = _LazyImport("pptx.opc.constants", "CONTENT_TYPE")
+RT = _LazyImport("pptx.opc.constants", "RELATIONSHIP_TYPE")
+serialize_part_xml = _LazyImport("pptx.opc.oxml", "serialize_part_xml")
+parse_xml = _LazyImport("pptx.oxml", "parse_xml")
+nsdecls = _LazyImport("pptx.oxml.ns", "nsdecls")
+qn = _LazyImport("pptx.oxml.ns", "qn")
+PptxImage = _LazyImport("pptx.parts.image", "Image")
+SlideLayoutPart = _LazyImport("pptx.parts.slide", "SlideLayoutPart")
+SlideShapes = _LazyImport("pptx.shapes.shapetree", "SlideShapes")
+Font = _LazyImport("pptx.text.text", "Font")
+PILImage = _LazyImport("PIL.Image")
+ImageDraw = _LazyImport("PIL.ImageDraw")
+ImageFont = _LazyImport("PIL.ImageFont")
+pygments_lexers = _LazyImport("pygments.lexers")
+ProcessPoolExecutor = _LazyImport("concurrent.futures", "ProcessPoolExecutor")
+asyncio = _LazyImport("asyncio")
+http_client = _LazyImport("http.client")
+urlsplit = _LazyImport("urllib.parse", "urlsplit")
+urljoin = _LazyImport("urllib.parse", "urljoin")
+
+__version__ = "1.1.0"
 
 app = typer.Typer(
     name="pptx-gen",
@@ -25,22 +100,46 @@ console = Console()
 
 
 class Theme:
-    PRIMARY = RGBColor(0x1E, 0x3A, 0x5F)
-    SECONDARY = RGBColor(0x3D, 0x5A, 0x80)
-    ACCENT = RGBColor(0xE0, 0x8E, 0x45)
+    PRIMARY = "1E3A5F"
+    SECONDARY = "3D5A80"
+    ACCENT = "E08E45"
+
+    TEXT_DARK = "2D3A4A"
+    TEXT_LIGHT = "FFFFFF"
+    TEXT_MUTED = "6C757D"
+
+    BG_LIGHT = "F8F9FA"
+    BG_CODE = "2D2D2D"
+
+    CODE_KEYWORD = "569CD6"
+    CODE_TYPE = "4EC9B0"
+    CODE_FUNCTION = "DCDCAA"
+    CODE_STRING = "CE9178"
+    CODE_NUMBER = "B5CEA8"
+    CODE_COMMENT = "6A9955"
 
-    TEXT_DARK = RGBColor(0x2D, 0x3A, 0x4A)
-    TEXT_LIGHT = RGBColor(0xFF, 0xFF, 0xFF)
-    TEXT_MUTED = RGBColor(0x6C, 0x75, 0x7D)
+    TITLE_SIZE = 36
+    SUBTITLE_SIZE = 20
+    BODY_SIZE = 18
+    BODY_MIN_SIZE = 12
+    CODE_SIZE = 14
+    CODE_MIN_SIZE = 10
+    FOOTER_SIZE = 10
 
-    BG_LIGHT = RGBColor(0xF8, 0xF9, 0xFA)
-    BG_CODE = RGBColor(0x2D, 0x2D, 0x2D)
 
-    TITLE_SIZE = Pt(36)
-    SUBTITLE_SIZE = Pt(20)
-    BODY_SIZE = Pt(18)
-    CODE_SIZE = Pt(14)
-    FOOTER_SIZE = Pt(10)
+@functools.lru_cache(maxsize=None)
+def _code_fingerprint() -> str:
+    # Cached parses and renders are only as good as the code that made them, so any edit to this file starts afresh.
+    try:
+        return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
+    except OSError:
+        return __version__
+
+
+def _theme_fingerprint() -> str:
+    return repr(sorted(
+        (name, str(value)) for name, value in vars(Theme).items() if not name.startswith("_")
+    ))
 
 
 class SlideType(Enum):
@@ -53,18 +152,104 @@ class SlideType(Enum):
     TWO_COLUMN = auto()
 
 
-@dataclass
+class InlineStyle(IntFlag):
+    PLAIN = 0
+    BOLD = auto()
+    ITALIC = auto()
+    CODE = auto()
+
+
+INLINE_PATTERN = re.compile(
+    r'(`[^`]+`)'
+    r'|(\*\*[^*]+\*\*)'
+    r'|(\*[^*]+\*)'
+)
+INLINE_CODE_PATTERN = re.compile(r'`[^`]+`')
+
+# Spans are flat (start, end, style) triples into the source text; () means the text is all plain.
+InlineSpans = tuple[int | InlineStyle, ...]
+
+
+@functools.lru_cache(maxsize=8192)
+def parse_inline(text: str) -> InlineSpans:
+    spans: list[int | InlineStyle] = []
+    pos = 0
+    for match in INLINE_PATTERN.finditer(text):
+        if match.start() > pos:
+            spans += (pos, match.start(), InlineStyle.PLAIN)
+
+        start, end = match.span()
+        if text[start] == '`':
+            spans += (start + 1, end - 1, InlineStyle.CODE)
+        elif text.startswith('**', start):
+            _split_inline_code(spans, text, start + 2, end - 2, InlineStyle.BOLD)
+        else:
+            _split_inline_code(spans, text, start + 1, end - 1, InlineStyle.ITALIC)
+
+        pos = end
+
+    if not spans:
+        return ()
+    if pos < len(text):
+        spans += (pos, len(text), InlineStyle.PLAIN)
+    return tuple(spans)
+
+
+def _split_inline_code(spans: list, text: str, start: int, end: int, style: InlineStyle) -> None:
+    pos = start
+    for match in INLINE_CODE_PATTERN.finditer(text, start, end):
+        if match.start() > pos:
+            spans += (pos, match.start(), style)
+        spans += (match.start() + 1, match.end() - 1, style | InlineStyle.CODE)
+        pos = match.end()
+    if pos < end:
+        spans += (pos, end, style)
+
+
+@dataclass(frozen=True, slots=True)
 class Slide:
-    slide_type: SlideType
     title: str = ""
-    content: list[str] = field(default_factory=list)
+    source_line: int = field(default=0, compare=False)
+
+    slide_type: ClassVar[SlideType]
+    content: ClassVar[tuple[str, ...]] = ()
+    spans: ClassVar[tuple[InlineSpans, ...]] = ()
+    code: ClassVar[str] = ""
+    code_language: ClassVar[str] = ""
+    image_path: ClassVar[str] = ""
+
+
+@dataclass(frozen=True, slots=True)
+class ContentSlide(Slide):
+    content: tuple[str, ...] = ()
+    image_path: str = ""
+    spans: tuple[InlineSpans, ...] = field(default=(), compare=False, repr=False)
+
+    slide_type: ClassVar[SlideType] = SlideType.CONTENT
+
+    def __post_init__(self) -> None:
+        # The parser hands spans in; a slide built by hand gets them here so its bullets still render.
+        if len(self.spans) != len(self.content):
+            object.__setattr__(self, "spans", tuple(parse_inline(line) for line in self.content))
+
+
+@dataclass(frozen=True, slots=True)
+class CodeSlide(Slide):
+    content: tuple[str, ...] = ()
     code: str = ""
     code_language: str = ""
+
+    slide_type: ClassVar[SlideType] = SlideType.CODE
+
+
+@dataclass(frozen=True, slots=True)
+class ImageSlide(Slide):
     image_path: str = ""
-    notes: str = ""
 
+    slide_type: ClassVar[SlideType] = SlideType.IMAGE
 
-@dataclass
+
+@dataclass(slots=True)
 class Chapter:
     order: int
     filename: str
@@ -72,32 +257,1012 @@ class Chapter:
     agenda: str
     slides: list[Slide] = field(default_factory=list)
 
+    @property
+    def slide_count(self) -> int:
+        return 1 + (1 if self.agenda else 0) + len(self.slides)
+
+
+@dataclass
+class RenderedSlide:
+    xml: bytes
+    layout: str
+    images: dict[str, bytes] = field(default_factory=dict)
+
+
+@dataclass
+class DedupStats:
+    reused_slides: int = 0
+    media_references: int = 0
+    media_files: int = 0
+    media_bytes: int = 0
+    stored_media_bytes: int = 0
+
+    @property
+    def media_ratio(self) -> float:
+        return self.media_bytes / self.stored_media_bytes if self.stored_media_bytes else 1.0
+
+
+@dataclass
+class DeckJob:
+    input_dir: Path
+    output: Path
+    title: str
+    author: str = ""
+
+
+@dataclass
+class DeckResult:
+    output: Path
+    slides: int = 0
+    seconds: float = 0.0
+    image_hits: int = 0
+    image_misses: int = 0
+    error: Optional[str] = None
+
+
+class BuildCache:
+    MAX_BYTES = 1 << 30
+    MAX_AGE = 30 * 86400
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = cache_dir
+        self.entries: dict[str, object] = {}
+        self.image_digests: dict[tuple[Path, int, int], str] = {}
+        self.hits = 0
+        self.misses = 0
+        self._touched: set[str] = set()
+        if cache_dir is not None:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(*parts: str | bytes) -> str:
+        digest = hashlib.sha256()
+        for part in (_code_fingerprint(), *parts):
+            if isinstance(part, str):
+                part = part.encode("utf-8")
+            digest.update(len(part).to_bytes(8, "little"))
+            digest.update(part)
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        if key in self.entries:
+            self.hits += 1
+            self._touched.add(key)
+            return self.entries[key]
+
+        if self.cache_dir is not None:
+            path = self.cache_dir / f"{key}.pkl"
+            try:
+                value = pickle.loads(path.read_bytes())
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+                value = None
+            if value is not None:
+                # Eviction drops the least recently used entries first, so a hit counts as a use.
+                try:
+                    os.utime(path)
+                except OSError:
+                    pass
+                self.entries[key] = value
+                self.hits += 1
+                self._touched.add(key)
+                return value
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value) -> None:
+        self.entries[key] = value
+        self._touched.add(key)
+        if self.cache_dir is not None:
+            path = self.cache_dir / f"{key}.pkl"
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_bytes(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+            os.replace(tmp, path)
+
+    def image_digest(self, path: Path) -> str:
+        stat = path.stat()
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        digest = self.image_digests.get(key)
+        if digest is None:
+            digest = hashlib.sha256(path.read_bytes()).hexdigest()
+            self.image_digests[key] = digest
+        return digest
+
+    def prune(self) -> None:
+        self.entries = {key: value for key, value in self.entries.items() if key in self._touched}
+        self._touched = set()
+
+    def evict(self, max_bytes: int = MAX_BYTES, max_age: float = MAX_AGE) -> tuple[int, int]:
+        if self.cache_dir is None:
+            return 0, 0
+
+        entries = []
+        for path in self.cache_dir.glob("*.pkl"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        cutoff = time.time() - max_age
+        kept = removed = freed = 0
+        for mtime, size, path in sorted(entries, reverse=True):
+            if mtime >= cutoff and kept + size <= max_bytes:
+                kept += size
+                continue
+            path.unlink(missing_ok=True)
+            removed += 1
+            freed += size
+        return removed, freed
+
+
+@dataclass
+class ImageAsset:
+    path: Path
+    width: int
+    height: int
+
+
+@dataclass
+class OptimizedImage:
+    source: Path
+    path: Path
+    original_bytes: int
+    optimized_bytes: int
+    size: tuple[int, int]
+    format: str
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_bytes - self.optimized_bytes
+
+
+class ImageAssetCache:
+    PPTX_SUPPORTED_FORMATS = {".png", ".jpg", ".jpeg", ".gif", ".tiff", ".tif", ".bmp"}
+
+    def __init__(self, work_dir: Optional[Path] = None):
+        self.assets: dict[tuple[Path, int, int], ImageAsset] = {}
+        self.hits = 0
+        self.misses = 0
+        self.optimized: dict[Path, Path] = {}
+        self._work_dir = work_dir
+        self._tmp_dir: Optional[tempfile.TemporaryDirectory] = None
+
+    def get(self, path: Path) -> ImageAsset:
+        stat = path.stat()
+        key = (path.resolve(), stat.st_mtime_ns, stat.st_size)
+        asset = self.assets.get(key)
+        if asset is not None:
+            self.hits += 1
+            return asset
+
+        self.misses += 1
+        with PILImage.open(path) as img:
+            width, height = img.size
+            embed_path = self.optimized.get(key[0], path)
+            if embed_path.suffix.lower() not in self.PPTX_SUPPORTED_FORMATS:
+                embed_path = self._converted_path(key)
+                if not embed_path.exists():
+                    tmp_path = embed_path.with_name(f".{embed_path.name}.{os.getpid()}.tmp")
+                    img.convert("RGBA").save(tmp_path, "PNG")
+                    os.replace(tmp_path, embed_path)
+
+        asset = ImageAsset(path=embed_path, width=width, height=height)
+        self.assets[key] = asset
+        return asset
+
+    def set_optimized(self, source: Path, optimized: Path) -> None:
+        source = source.resolve()
+        self.optimized[source] = optimized
+        self.assets = {key: asset for key, asset in self.assets.items() if key[0] != source}
+
+    @property
+    def work_dir(self) -> Path:
+        if self._work_dir is None:
+            self._tmp_dir = tempfile.TemporaryDirectory(prefix="pptx-images-")
+            self._work_dir = Path(self._tmp_dir.name)
+        return self._work_dir
+
+    def close(self) -> None:
+        if self._tmp_dir is not None:
+            self._tmp_dir.cleanup()
+            self._tmp_dir = None
+            self._work_dir = None
+        self.assets.clear()
+
+    def _converted_path(self, key: tuple[Path, int, int]) -> Path:
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:12]
+        return self.work_dir / f"{key[0].stem}-{digest}.png"
+
+
+class AssetIndex:
+    IMAGE_EXTENSIONS = ImageAssetCache.PPTX_SUPPORTED_FORMATS | {".webp", ".ico", ".jfif"}
+
+    def __init__(self, roots: Iterable[Path]):
+        self.roots = list(roots)
+        self.files: dict[str, Path] = {}
+        self.duplicates: dict[str, list[Path]] = {}
+        self._resolved: dict[str, Optional[Path]] = {}
+
+        for root in self.roots:
+            try:
+                with os.scandir(root) as entries:
+                    names = sorted(entry.name for entry in entries if entry.is_file() and not entry.name.startswith("."))
+            except OSError:
+                continue
+            for name in names:
+                path = root / name
+                if name in self.files:
+                    self.duplicates.setdefault(name, [self.files[name]]).append(path)
+                else:
+                    self.files[name] = path
+
+    def resolve(self, raw_path: str) -> Optional[Path]:
+        if raw_path in self._resolved:
+            return self._resolved[raw_path]
+
+        path = Path(raw_path)
+        if len(path.parts) == 1:
+            resolved = self.files.get(raw_path) or (path if path.exists() else None)
+        else:
+            resolved = path if path.exists() else self.files.get(path.name)
+        self._resolved[raw_path] = resolved
+        return resolved
+
+    def add_remote(self, paths: dict[str, Path]) -> None:
+        self._resolved.update(paths)
+
+    def check(self, chapters: Iterable[Chapter]) -> tuple[list[tuple[Chapter, Slide]], list[Path]]:
+        missing = []
+        used = set()
+        for chapter in chapters:
+            for slide_data in chapter.slides:
+                if not slide_data.image_path:
+                    continue
+                resolved = self.resolve(slide_data.image_path)
+                if resolved is None:
+                    missing.append((chapter, slide_data))
+                else:
+                    used.add(resolved)
+
+        unused = [
+            path for path in self.files.values()
+            if path not in used and path.suffix.lower() in self.IMAGE_EXTENSIONS
+        ]
+        return missing, unused
+
+
+class RemoteImageStore:
+    CONTENT_TYPES = {
+        "image/png": ".png", "image/jpeg": ".jpg", "image/gif": ".gif", "image/bmp": ".bmp",
+        "image/tiff": ".tiff", "image/webp": ".webp", "image/x-icon": ".ico",
+    }
+    MAX_REDIRECTS = 5
+
+    def __init__(
+        self, store_dir: Path, ttl: float = 86400, offline: bool = False, concurrency: int = 8, timeout: float = 10.0
+    ):
+        self.store_dir = store_dir
+        self.ttl = ttl
+        self.offline = offline
+        self.concurrency = concurrency
+        self.timeout = timeout
+        # One entry file per URL, so concurrent builds sharing the store never overwrite each other's entries.
+        self.index_dir = store_dir / "index"
+        self.index: dict[str, Optional[dict]] = {}
+        self.fresh = 0
+        self.revalidated = 0
+        self.downloaded = 0
+        self.failed: dict[str, str] = {}
+        self._pools: dict[tuple[str, str, int], list] = {}
+        # Appended from the fetch threads; list.append is atomic where += on a counter is not.
+        self._opened: list[tuple[str, str, int]] = []
+        self._responses: list[int] = []
+
+    @property
+    def requests(self) -> int:
+        return len(self._responses)
+
+    @property
+    def connections(self) -> int:
+        return len(self._opened)
+
+    @staticmethod
+    def is_remote(raw_path: str) -> bool:
+        return raw_path.startswith(("http://", "https://"))
+
+    def lookup(self, url: str) -> Optional[Path]:
+        entry = self._entry(url)
+        path = self.store_dir / entry["object"] if entry else None
+        return path if path is not None and path.exists() else None
+
+    def _entry(self, url: str) -> Optional[dict]:
+        if url not in self.index:
+            try:
+                self.index[url] = json.loads(self._entry_path(url).read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self.index[url] = None
+        return self.index[url]
+
+    def _save_entry(self, url: str, entry: dict) -> None:
+        self.index[url] = entry
+        path = self._entry_path(url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"url": url, **entry}, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def _entry_path(self, url: str) -> Path:
+        return self.index_dir / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+    def fetch(self, urls: Iterable[str]) -> dict[str, Path]:
+        urls = sorted(set(urls))
+        self.fresh = self.revalidated = self.downloaded = 0
+        self.failed = {}
+        self._opened, self._responses = [], []
+        if self.offline:
+            paths = [self.lookup(url) for url in urls]
+        else:
+            self.store_dir.mkdir(parents=True, exist_ok=True)
+            paths = asyncio.run(self._fetch_all(urls))
+        return {url: path for url, path in zip(urls, paths) if path is not None}
+
+    async def _fetch_all(self, urls: list[str]) -> list[Optional[Path]]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        try:
+            return await asyncio.gather(*(self._fetch(url, semaphore) for url in urls))
+        finally:
+            for pool in self._pools.values():
+                for connection in pool:
+                    connection.close()
+            self._pools.clear()
+
+    async def _fetch(self, url: str, semaphore) -> Optional[Path]:
+        entry = self._entry(url)
+        stored = self.lookup(url)
+        if stored is not None and time.time() - entry["checked"] < self.ttl:
+            self.fresh += 1
+            return stored
+
+        headers = {}
+        if stored is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        async with semaphore:
+            try:
+                status, response_headers, body = await asyncio.to_thread(self._request, url, headers)
+            except (OSError, ValueError, http_client.HTTPException) as e:
+                self.failed[url] = str(e) or type(e).__name__
+                return stored
+
+        if status == 304 and stored is not None:
+            self._save_entry(url, {**entry, "checked": time.time()})
+            self.revalidated += 1
+            return stored
+        if status != 200:
+            self.failed[url] = f"HTTP {status}"
+            return stored
+
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.store_dir / f"{digest}{self._suffix(url, response_headers.get('Content-Type', ''))}"
+        if not path.exists():
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            tmp.write_bytes(body)
+            os.replace(tmp, path)
+        self._save_entry(url, {
+            "object": path.name,
+            "etag": response_headers.get("ETag"),
+            "last_modified": response_headers.get("Last-Modified"),
+            "checked": time.time(),
+        })
+        self.downloaded += 1
+        return path
+
+    def _request(self, url: str, headers: dict[str, str]) -> tuple[int, dict[str, str], bytes]:
+        for _ in range(self.MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            if parts.scheme not in ("http", "https") or not parts.hostname:
+                raise ValueError(f"unsupported URL {url}")
+            key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == "https" else 80))
+            target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+            pool = self._pools.setdefault(key, [])
+            try:
+                connection, reused = pool.pop(), True
+            except IndexError:
+                connection, reused = self._connect(*key), False
+            try:
+                connection.request("GET", target, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (OSError, http_client.HTTPException):
+                connection.close()
+                if not reused:
+                    raise
+                # The server dropped an idle keep-alive connection; retry once on a fresh one.
+                connection = self._connect(*key)
+                connection.request("GET", target, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            self._responses.append(response.status)
+
+            if response.will_close:
+                connection.close()
+            else:
+                pool.append(connection)
+
+            location = response.getheader("Location")
+            if response.status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                continue
+            return response.status, dict(response.getheaders()), body
+        raise ValueError(f"too many redirects for {url}")
+
+    def _connect(self, scheme: str, host: str, port: int):
+        self._opened.append((scheme, host, port))
+        if scheme == "https":
+            return http_client.HTTPSConnection(host, port, timeout=self.timeout)
+        return http_client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _suffix(self, url: str, content_type: str) -> str:
+        suffix = Path(urlsplit(url).path).suffix.lower()
+        if suffix in AssetIndex.IMAGE_EXTENSIONS:
+            return suffix
+        return self.CONTENT_TYPES.get(content_type.split(";")[0].strip().lower(), "")
+
+
+class ImageOptimizer:
+    def __init__(self, max_dpi: int, jpeg_quality: int = 85, max_workers: Optional[int] = None):
+        self.max_dpi = max_dpi
+        self.jpeg_quality = jpeg_quality
+        self.max_workers = max_workers
+
+    def optimize(self, targets: dict[Path, tuple[int, int]], work_dir: Path) -> list[OptimizedImage]:
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(lambda item: self._optimize(item[0], item[1], work_dir), targets.items()))
+
+    def target_pixels(self, width_emu: int, height_emu: int) -> tuple[int, int]:
+        return (
+            max(1, round(width_emu / Inches(1) * self.max_dpi)),
+            max(1, round(height_emu / Inches(1) * self.max_dpi)),
+        )
+
+    def _optimize(self, source: Path, box: tuple[int, int], work_dir: Path) -> OptimizedImage:
+        original_bytes = source.stat().st_size
+        with PILImage.open(source) as img:
+            img.load()
+            target_w, target_h = self.target_pixels(*box)
+            if img.width > target_w or img.height > target_h:
+                scale = min(target_w / img.width, target_h / img.height)
+                img = img.resize(
+                    (max(1, round(img.width * scale)), max(1, round(img.height * scale))),
+                    PILImage.Resampling.LANCZOS,
+                )
+
+            has_alpha = img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info)
+            if not has_alpha and img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            elif has_alpha and img.mode != "RGBA":
+                img = img.convert("RGBA")
+
+            fmt, buffer = "PNG", io.BytesIO()
+            img.save(buffer, "PNG", optimize=True)
+            if not has_alpha:
+                jpeg = io.BytesIO()
+                img.save(jpeg, "JPEG", quality=self.jpeg_quality, optimize=True)
+                if jpeg.tell() * 2 < buffer.tell():
+                    fmt, buffer = "JPEG", jpeg
+            size = img.size
+
+        if buffer.tell() >= original_bytes and source.suffix.lower() in ImageAssetCache.PPTX_SUPPORTED_FORMATS:
+            with PILImage.open(source) as original:
+                return OptimizedImage(source, source, original_bytes, original_bytes, original.size, original.format or "")
+
+        digest = hashlib.sha1(f"{source.resolve()}:{box}:{self.max_dpi}:{self.jpeg_quality}".encode()).hexdigest()[:12]
+        path = work_dir / f"{source.stem}-{digest}.{'png' if fmt == 'PNG' else 'jpg'}"
+        path.write_bytes(buffer.getbuffer())
+        return OptimizedImage(source, path, original_bytes, buffer.tell(), size, fmt)
+
+
+def _peak_memory_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass
+class ProfileEvent:
+    name: str
+    category: str
+    start: float
+    duration: float
+    peak_growth: int
+    block_growth: int
+    args: dict = field(default_factory=dict)
+
+
+class Profiler:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.events: list[ProfileEvent] = []
+        self._origin = time.perf_counter()
+
+    def wrap(self, obj, name: str, label: Optional[str] = None, category: str = "phase", describe=None) -> None:
+        method = getattr(obj, name)
+        span = self.span
+
+        def timed(*args, **kwargs):
+            with span(label or name, category, **(describe(*args, **kwargs) if describe else {})):
+                return method(*args, **kwargs)
+
+        setattr(obj, name, timed)
+
+    @contextmanager
+    def span(self, name: str, category: str = "phase", **args):
+        if not self.enabled:
+            yield
+            return
+
+        # The RSS high-water mark only moves when a span beats every earlier one, so the change in
+        # live allocator blocks is recorded too: it shows what a span keeps even below the old peak.
+        peak = _peak_memory_bytes() or 0
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.events.append(ProfileEvent(
+                name, category, start - self._origin, time.perf_counter() - start,
+                (_peak_memory_bytes() or 0) - peak, sys.getallocatedblocks() - blocks, args,
+            ))
+
+    def totals(self, by: str = "name") -> dict[str, dict[str, float]]:
+        totals: dict[str, dict[str, float]] = {}
+        for event in self.events:
+            total = totals.setdefault(
+                getattr(event, by), {"calls": 0, "seconds": 0.0, "peak_growth": 0, "block_growth": 0},
+            )
+            total["calls"] += 1
+            total["seconds"] += event.duration
+            total["peak_growth"] += event.peak_growth
+            total["block_growth"] += event.block_growth
+        for total in totals.values():
+            total["mean_ms"] = total["seconds"] / total["calls"] * 1000
+        return totals
+
+    def write_trace(self, path: Path) -> None:
+        pid = os.getpid()
+        trace = {
+            "displayTimeUnit": "ms",
+            "traceEvents": [
+                {
+                    "name": event.name,
+                    "cat": event.category,
+                    "ph": "X",
+                    "ts": event.start * 1_000_000,
+                    "dur": event.duration * 1_000_000,
+                    "pid": pid,
+                    "tid": 0,
+                    "args": {**event.args, "peak_growth": event.peak_growth, "block_growth": event.block_growth},
+                }
+                for event in self.events
+            ],
+        }
+        path.write_text(json.dumps(trace), encoding="utf-8")
+
+
+class OutputFormat(str, Enum):
+    PPTX = "pptx"
+    HTML = "html"
+
+
+class ReportFormat(str, Enum):
+    JSON = "json"
+    PROMETHEUS = "prometheus"
+
+
+class PackageMode(str, Enum):
+    DRAFT = "draft"
+    DEFAULT = "default"
+    MAX = "max"
+
+
+@dataclass(frozen=True)
+class Packaging:
+    xml_level: int = 6
+    media_level: int = 6
+
+    # PNG, JPEG and GIF are compressed already, so deflating them again mostly burns CPU.
+    COMPRESSED_MEDIA: ClassVar[frozenset[str]] = frozenset({".png", ".jpg", ".jpeg", ".gif"})
+
+    @classmethod
+    def preset(cls, mode: PackageMode, xml_level: Optional[int] = None, media_level: Optional[int] = None) -> "Packaging":
+        packaging = PACKAGING_PRESETS[PackageMode(mode)]
+        return cls(
+            packaging.xml_level if xml_level is None else xml_level,
+            packaging.media_level if media_level is None else media_level,
+        )
+
+    def level(self, name: str) -> int:
+        return self.media_level if os.path.splitext(name)[1].lower() in self.COMPRESSED_MEDIA else self.xml_level
+
+    def write(self, archive: zipfile.ZipFile, name: str, data: bytes) -> None:
+        level = self.level(name)
+        if level:
+            archive.writestr(name, data, zipfile.ZIP_DEFLATED, level)
+        else:
+            archive.writestr(name, data, zipfile.ZIP_STORED)
+
+
+PACKAGING_PRESETS = {
+    PackageMode.DRAFT: Packaging(xml_level=1, media_level=0),
+    PackageMode.DEFAULT: Packaging(xml_level=6, media_level=6),
+    PackageMode.MAX: Packaging(xml_level=9, media_level=9),
+}
+
+
+def _set_shape_text(xml: bytes, name: str, text: str) -> bytes:
+    element = parse_xml(xml)
+    for node in element.xpath(f'.//p:sp[p:nvSpPr/p:cNvPr/@name="{name}"]//a:t'):
+        node.text = text
+    return serialize_part_xml(element)
+
+
+class DeckWriter:
+    PACKAGE_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+    TYPES_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+
+    def __init__(
+        self,
+        output_path: Path,
+        prs,
+        profiler: Optional[Profiler] = None,
+        stats: Optional[DedupStats] = None,
+        packaging: Optional[Packaging] = None,
+    ):
+        self.profiler = profiler or Profiler(enabled=False)
+        self.stats = stats or DedupStats()
+        self.packaging = packaging or Packaging()
+        self.write_seconds = 0.0
+        self.slide_sizes: list[tuple[int, int]] = []
+        skeleton = io.BytesIO()
+        with self.profiler.span("skeleton", "save"):
+            prs.save(skeleton)
+
+        self.presentation_name = prs.part.partname.membername
+        self.presentation_rels_name = prs.part.partname.rels_uri.membername
+        self.slide_rids: list[str] = []
+        self.media: dict[str, str] = {}
+        self.media_types: dict[str, str] = {}
+
+        self.output_path = output_path
+        self._tmp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}{PresentationBuilder.SUFFIX}.tmp")
+        self._zip = zipfile.ZipFile(self._tmp_path, "w", compression=zipfile.ZIP_DEFLATED)
+        with zipfile.ZipFile(skeleton) as source:
+            self._skeleton = {name: source.read(name) for name in source.namelist()}
+
+        for name, blob in self._skeleton.items():
+            if name not in ("[Content_Types].xml", self.presentation_name, self.presentation_rels_name):
+                self._write(name, blob)
+
+    def __enter__(self) -> "DeckWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._zip.close()
+            self._tmp_path.unlink(missing_ok=True)
+
+    def add(self, rendered: RenderedSlide, number: int) -> None:
+        with self.profiler.span("write slide", "save", number=number):
+            index = len(self.slide_rids) + 1
+            xml = _set_shape_text(rendered.xml, PresentationBuilder.SLIDE_NUMBER_NAME, str(number))
+
+            layout_rid = next(f"rId{n}" for n in range(1, len(rendered.images) + 2) if f"rId{n}" not in rendered.images)
+            rels = [(layout_rid, RT.SLIDE_LAYOUT, rendered.layout)]
+            for rId, blob in rendered.images.items():
+                rels.append((rId, RT.IMAGE, f"../media/{self._add_media(blob)}"))
+
+            self._write(f"ppt/slides/slide{index}.xml", xml)
+            self._write(f"ppt/slides/_rels/slide{index}.xml.rels", self._rels_xml(rels))
+            self.slide_rids.append(f"slide{index}.xml")
+            self.slide_sizes.append((len(xml), sum(map(len, rendered.images.values()))))
+
+    def close(self) -> None:
+        with self.profiler.span("package", "save"):
+            presentation = parse_xml(self._skeleton[self.presentation_name])
+            rels = etree.fromstring(self._skeleton[self.presentation_rels_name])
+
+            used = {rel.get("Id") for rel in rels}
+            next_rid = 1
+            sldIdLst = presentation.get_or_add_sldIdLst()
+            for slide_id, target in enumerate(self.slide_rids, start=256):
+                while f"rId{next_rid}" in used:
+                    next_rid += 1
+                rId = f"rId{next_rid}"
+                used.add(rId)
+                etree.SubElement(rels, f"{{{self.PACKAGE_NS}}}Relationship", Id=rId, Type=RT.SLIDE, Target=f"slides/{target}")
+                etree.SubElement(sldIdLst, qn("p:sldId"), {"id": str(slide_id), qn("r:id"): rId})
+
+            types = etree.fromstring(self._skeleton["[Content_Types].xml"])
+            for ext, content_type in sorted(self.media_types.items()):
+                if types.find(f'{{{self.TYPES_NS}}}Default[@Extension="{ext}"]') is None:
+                    etree.SubElement(types, f"{{{self.TYPES_NS}}}Default", Extension=ext, ContentType=content_type)
+            for target in self.slide_rids:
+                etree.SubElement(types, f"{{{self.TYPES_NS}}}Override", PartName=f"/ppt/slides/{target}", ContentType=CT.PML_SLIDE)
+
+            self._write("[Content_Types].xml", serialize_part_xml(types))
+            self._write(self.presentation_name, serialize_part_xml(presentation))
+            self._write(self.presentation_rels_name, serialize_part_xml(rels))
+            self._zip.close()
+            os.replace(self._tmp_path, self.output_path)
+
+    def _add_media(self, blob: bytes) -> str:
+        digest = hashlib.sha1(blob).hexdigest()
+        self.stats.media_references += 1
+        self.stats.media_bytes += len(blob)
+        if digest not in self.media:
+            image = PptxImage.from_blob(blob)
+            name = f"image{len(self.media) + 1}.{image.ext}"
+            self._write(f"ppt/media/{name}", blob)
+            self.media[digest] = name
+            self.media_types[image.ext] = image.content_type
+            self.stats.media_files += 1
+            self.stats.stored_media_bytes += len(blob)
+        return self.media[digest]
+
+    def _write(self, name: str, data: bytes) -> None:
+        start = time.perf_counter()
+        self.packaging.write(self._zip, name, data)
+        self.write_seconds += time.perf_counter() - start
+
+    def _rels_xml(self, rels: list[tuple[str, str, str]]) -> bytes:
+        root = etree.Element(f"{{{self.PACKAGE_NS}}}Relationships", nsmap={None: self.PACKAGE_NS})
+        for rId, reltype, target in rels:
+            etree.SubElement(root, f"{{{self.PACKAGE_NS}}}Relationship", Id=rId, Type=reltype, Target=target)
+        return serialize_part_xml(root)
+
+
+class _SectionBuilder:
+    __slots__ = (
+        "started", "line", "title", "image_path", "image_item", "code_language", "code_lines",
+        "in_fence", "collecting_code", "items", "items_before_code", "text_lines",
+    )
+
+    FENCE_PATTERN = re.compile(r'^\s*```(\w*)[^`]*$')
+    IMAGE_PATTERN = re.compile(r'!\[([^\]]*)\]\(([^)\n]+)\)')
+    HEADING_PATTERN = re.compile(r'^(#{1,3})\s+(.+)$')
+    LIST_ITEM_PATTERN = re.compile(r'^\s*[-*+]\s+(.+)$')
+
+    def __init__(self):
+        self.started = False
+        self.line = 0
+        self.title: Optional[str] = None
+        self.image_path: Optional[str] = None
+        self.image_item: Optional[tuple[int, bool, Optional[str]]] = None
+        self.code_language: Optional[str] = None
+        self.code_lines: list[str] = []
+        self.in_fence = False
+        self.collecting_code = False
+        self.items: list[str] = []
+        self.items_before_code = 0
+        self.text_lines: list[str] = []
+
+    def feed(self, line: str, number: int, fence: bool = True) -> None:
+        if self.in_fence:
+            if "```" in line and line.lstrip().startswith("```"):
+                self.in_fence = False
+                self.collecting_code = False
+            elif self.collecting_code:
+                self.code_lines.append(line)
+            return
+
+        if not self.started:
+            if not line or line.isspace():
+                return
+            self.started = True
+            self.line = number
+            line = line.lstrip()
+
+        lead = line[:1]
+        if lead == " " or lead == "\t":
+            lead = line.lstrip()[:1]
+
+        if lead == "`" and fence:
+            opening = self.FENCE_PATTERN.match(line)
+            if opening:
+                self.in_fence = True
+                if self.code_language is None:
+                    self.code_language = opening.group(1)
+                    self.collecting_code = True
+                    self.items_before_code = len(self.items)
+                return
+
+        if self.image_path is None and "![" in line:
+            image = self.IMAGE_PATTERN.search(line)
+            if image:
+                self.image_path = image.group(2)
+                original = self.LIST_ITEM_PATTERN.match(line)
+                item = self.LIST_ITEM_PATTERN.match(line[:image.start()] + line[image.end():])
+                self.image_item = (len(self.items), original is not None, item.group(1).strip() if item else None)
+
+        if lead == "#":
+            heading = self.HEADING_PATTERN.match(line)
+            if heading:
+                if self.title is None:
+                    self.title = heading.group(2).strip()
+                if not self.items:
+                    self.text_lines.append("\n")
+                return
+
+        if lead and lead in "-*+":
+            item = self.LIST_ITEM_PATTERN.match(line)
+            if item:
+                self.items.append(item.group(1).strip())
+                return
+
+        if not self.items:
+            self.text_lines.append(line)
+
+    def unfence(self, line: str, number: int) -> None:
+        # The fence opened on this line never closed, so it is plain text after all.
+        self.in_fence = False
+        if self.collecting_code:
+            self.code_language = None
+            self.collecting_code = False
+            self.code_lines = []
+        self.feed(line, number, fence=False)
+
+    def finish(self) -> Optional[Slide]:
+        if not self.started:
+            return None
+
+        title = self.title or ""
+
+        if self.code_language is not None:
+            return CodeSlide(
+                title=title,
+                content=tuple(self.items[:self.items_before_code]),
+                code="".join(self.code_lines).strip(),
+                code_language=self.code_language or "text",
+                source_line=self.line,
+            )
+
+        if self.image_path is not None:
+            items = self._items_without_image()
+            if items:
+                return ContentSlide(
+                    title=title,
+                    content=tuple(items),
+                    spans=tuple(map(parse_inline, items)),
+                    image_path=self.image_path,
+                    source_line=self.line,
+                )
+            return ImageSlide(
+                title=title,
+                image_path=self.image_path,
+                source_line=self.line,
+            )
+
+        content_items = self.items
+        if not content_items:
+            text = "".join(self.text_lines).strip()
+            if text:
+                content_items = [text]
+
+        return ContentSlide(
+            title=title,
+            content=tuple(content_items),
+            spans=tuple(map(parse_inline, content_items)),
+            source_line=self.line,
+        )
+
+    def _items_without_image(self) -> list[str]:
+        index, replaces_item, replacement = self.image_item
+        items = self.items[:index]
+        if replacement is not None:
+            items.append(replacement)
+        items.extend(self.items[index + 1 if replaces_item else index:])
+        return items
+
 
 class MarkdownParser:
-    FRONTMATTER_PATTERN = re.compile(r'^---\s*\n(.*?)\n---\s*\n', re.DOTALL)
-    SLIDE_SEPARATOR = re.compile(r'\n---\s*\n')
-    CODE_BLOCK_PATTERN = re.compile(r'```(\w*)\n(.*?)```', re.DOTALL)
-    IMAGE_PATTERN = re.compile(r'!\[([^\]]*)\]\(([^)]+)\)')
-    HEADING_PATTERN = re.compile(r'^(#{1,3})\s+(.+)$', re.MULTILINE)
-    LIST_ITEM_PATTERN = re.compile(r'^[\s]*[-*+]\s+(.+)$', re.MULTILINE)
+    SEPARATOR_PATTERN = re.compile(r'^---\s*$')
+    MAP_THRESHOLD = 16 << 20
+    MAP_WINDOW = 1 << 16
 
     def parse_file(self, filepath: Path) -> Chapter:
-        content = filepath.read_text(encoding='utf-8')
-        order = self._extract_order(filepath.name)
-        title, agenda, content = self._parse_frontmatter(content)
+        with filepath.open(encoding='utf-8') as f:
+            return self.parse_lines(f, filepath.name)
 
-        if not title:
-            title = self._filename_to_title(filepath.stem)
+    @contextmanager
+    def open_chapter(self, filepath: Path, mapped: bool = False) -> Iterator[tuple[Chapter, Iterator[Slide]]]:
+        # Only one-shot streaming builds map big sources: truncating a mapped file kills the
+        # process with SIGBUS, and on Windows an open mapping stops editors from saving.
+        if mapped and filepath.stat().st_size >= self.MAP_THRESHOLD:
+            with filepath.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                yield self.read_chapter(self._mapped_lines(buffer), filepath.name)
+        else:
+            with filepath.open(encoding="utf-8") as f:
+                yield self.read_chapter(f, filepath.name)
+
+    def parse_lines(self, lines: Iterable[str], filename: str) -> Chapter:
+        chapter, slides = self.read_chapter(lines, filename)
+        chapter.slides = list(slides)
+        return chapter
 
-        slides = self._parse_slides(content)
+    def read_chapter(self, lines: Iterable[str], filename: str) -> tuple[Chapter, Iterator[Slide]]:
+        order = self._extract_order(filename)
+        title, agenda, lines, first_line = self._parse_frontmatter(iter(lines))
+
+        if not title:
+            title = self._filename_to_title(Path(filename).stem)
 
-        return Chapter(
+        chapter = Chapter(
             order=order,
-            filename=filepath.name,
+            filename=filename,
             title=title,
             agenda=agenda,
-            slides=slides
         )
+        return chapter, self.iter_slides(lines, first_line)
+
+    def sort_files(self, md_files: Iterable[Path]) -> list[Path]:
+        return sorted(md_files, key=lambda path: (self._extract_order(path.name), path.name))
+
+    def iter_slides(self, lines: Iterable[str], first_line: int = 1) -> Iterator[Slide]:
+        return self._iter_slides(lines, first_line, _SectionBuilder())
+
+    def _iter_slides(self, lines: Iterable[str], first_line: int, section: _SectionBuilder) -> Iterator[Slide]:
+        # A fence can run across separators, so the lines after an opening fence are held until it
+        # closes. If the file ends first, the fence was plain text and the held lines are read again.
+        held: Optional[list[str]] = None
+        fence_line, fence_number = "", 0
+        separator = self.SEPARATOR_PATTERN.match
+        feed = section.feed
+
+        for number, line in enumerate(lines, start=first_line):
+            if held is not None:
+                held.append(line)
+                feed(line, number)
+                if not section.in_fence:
+                    held = None
+                continue
+
+            if line[:3] == "---" and separator(line):
+                slide = section.finish()
+                if slide:
+                    yield slide
+                section = _SectionBuilder()
+                feed = section.feed
+                continue
+
+            feed(line, number)
+            if "```" in line and section.in_fence:
+                held, fence_line, fence_number = [], line, number
+
+        if held is not None:
+            section.unfence(fence_line, fence_number)
+            yield from self._iter_slides(held, fence_number + 1, section)
+            return
+
+        slide = section.finish()
+        if slide:
+            yield slide
+
+    def _mapped_lines(self, buffer: mmap.mmap) -> Iterator[str]:
+        # Decode the map a few slides at a time, cutting where the next window's first line starts a slide.
+        start = 0
+        while start < len(buffer):
+            end = buffer.find(b"\n---", start + self.MAP_WINDOW)
+            end = len(buffer) if end == -1 else end + 1
+            yield from io.StringIO(buffer[start:end].decode("utf-8"), newline=None)
+            start = end
 
     def _extract_order(self, filename: str) -> int:
         match = re.match(r'^(\d+)', filename)
@@ -108,459 +1273,2670 @@ class MarkdownParser:
         title = title.replace('_', ' ').replace('-', ' ')
         return title.title()
 
-    def _parse_frontmatter(self, content: str) -> tuple[str, str, str]:
+    def _parse_frontmatter(self, lines: Iterator[str]) -> tuple[str, str, Iterator[str], int]:
         title = ""
         agenda = ""
 
-        match = self.FRONTMATTER_PATTERN.match(content)
-        if match:
-            frontmatter = match.group(1)
-            content = content[match.end():]
+        first = next(lines, None)
+        if first is None:
+            return title, agenda, iter(()), 1
+        if not self.SEPARATOR_PATTERN.match(first):
+            return title, agenda, itertools.chain((first,), lines), 1
 
-            for line in frontmatter.split('\n'):
-                if ':' in line:
-                    key, value = line.split(':', 1)
-                    key = key.strip().lower()
-                    value = value.strip().strip('"\'')
+        frontmatter = []
+        for line in lines:
+            if self.SEPARATOR_PATTERN.match(line):
+                break
+            frontmatter.append(line)
+        else:
+            return title, agenda, itertools.chain((first,), frontmatter), 1
 
-                    if key == 'title':
-                        title = value
-                    elif key == 'agenda':
-                        agenda = value
+        for line in frontmatter:
+            if ':' in line:
+                key, value = line.split(':', 1)
+                key = key.strip().lower()
+                value = value.strip().strip('"\'')
 
-        return title, agenda, content
+                if key == 'title':
+                    title = value
+                elif key == 'agenda':
+                    agenda = value
 
-    def _parse_slides(self, content: str) -> list[Slide]:
-        slides = []
-        sections = self.SLIDE_SEPARATOR.split(content)
+        return title, agenda, lines, len(frontmatter) + 3
 
-        for section in sections:
-            section = section.strip()
-            if not section:
-                continue
 
-            slide = self._parse_section(section)
-            if slide:
-                slides.append(slide)
-
-        return slides
-
-    def _parse_section(self, section: str) -> Optional[Slide]:
-        code_match = self.CODE_BLOCK_PATTERN.search(section)
-        if code_match:
-            return self._parse_code_slide(section, code_match)
-
-        image_match = self.IMAGE_PATTERN.search(section)
-        if image_match:
-            section_without_image = section[:image_match.start()] + section[image_match.end():]
-            content_items = self._extract_list_items(section_without_image)
-            if content_items:
-                title = self._extract_title(section)
-                return Slide(
-                    slide_type=SlideType.CONTENT,
-                    title=title,
-                    content=content_items,
-                    image_path=image_match.group(2)
-                )
-            return self._parse_image_slide(section, image_match)
+# Pygments token types are tuples, so the longest matching prefix picks the color.
+CODE_TOKEN_COLORS = {
+    ("Keyword",): "CODE_KEYWORD",
+    ("Keyword", "Type"): "CODE_TYPE",
+    ("Name", "Builtin"): "CODE_TYPE",
+    ("Name", "Class"): "CODE_TYPE",
+    ("Name", "Function"): "CODE_FUNCTION",
+    ("Literal", "String"): "CODE_STRING",
+    ("Literal", "Number"): "CODE_NUMBER",
+    ("Comment",): "CODE_COMMENT",
+}
 
-        return self._parse_content_slide(section)
+# Highlighted code uses the same flat (start, end, color) triples as inline spans; () means plain.
+CodeSpans = tuple[int | str, ...]
 
-    def _parse_code_slide(self, section: str, code_match: re.Match) -> Slide:
-        title = self._extract_title(section)
-        language = code_match.group(1) or "text"
-        code = code_match.group(2).strip()
 
-        content_before = section[:code_match.start()].strip()
-        content_items = self._extract_list_items(content_before)
+@functools.lru_cache(maxsize=1024)
+def highlight_code(code: str, language: str) -> CodeSpans:
+    lexer = _code_lexer(language)
+    if lexer is None:
+        return ()
 
-        return Slide(
-            slide_type=SlideType.CODE,
-            title=title,
-            content=content_items,
-            code=code,
-            code_language=language
-        )
+    spans: list[int | str] = []
+    pos = 0
+    for token_type, value in lexer.get_tokens(code):
+        end = pos + len(value)
+        color = _token_color(token_type)
+        if spans and (spans[-1] == color or value.isspace()):
+            spans[-2] = end
+        else:
+            spans += (pos, end, color)
+        pos = end
 
-    def _parse_image_slide(self, section: str, image_match: re.Match) -> Slide:
-        title = self._extract_title(section)
-        image_path = image_match.group(2)
+    if pos != len(code) or spans[2::3].count(Theme.TEXT_LIGHT) == len(spans) // 3:
+        return ()
+    return tuple(spans)
 
-        return Slide(
-            slide_type=SlideType.IMAGE,
-            title=title,
-            image_path=image_path
-        )
 
-    def _parse_content_slide(self, section: str) -> Slide:
-        title = self._extract_title(section)
-        content_items = self._extract_list_items(section)
+@functools.lru_cache(maxsize=None)
+def _code_lexer(language: str):
+    if not language or language == "text":
+        return None
+    try:
+        return pygments_lexers.get_lexer_by_name(language, stripnl=False, ensurenl=False)
+    except pygments_lexers.ClassNotFound:
+        return None
 
-        if not content_items:
-            text = self.HEADING_PATTERN.sub('', section).strip()
-            if text:
-                content_items = [text]
 
-        return Slide(
-            slide_type=SlideType.CONTENT,
-            title=title,
-            content=content_items
+@functools.lru_cache(maxsize=None)
+def _token_color(token_type: tuple[str, ...]) -> str:
+    for length in range(len(token_type), 0, -1):
+        name = CODE_TOKEN_COLORS.get(tuple(token_type[:length]))
+        if name is not None:
+            return getattr(Theme, name)
+    return Theme.TEXT_LIGHT
+
+
+@dataclass(frozen=True, slots=True)
+class TextFit:
+    size: int
+    overflow: bool = False
+
+
+class _GlyphWidths(dict):
+    def __init__(self, widths: dict[str, int], default: int):
+        super().__init__(widths)
+        self.default = default
+
+    def __missing__(self, char: str) -> int:
+        width = self.default * 2 if unicodedata.east_asian_width(char) in "WF" else self.default
+        self[char] = width
+        return width
+
+
+class _LruCache(collections.OrderedDict):
+    def __init__(self, maxsize: int):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
+class TextFitter:
+    UNITS_PER_EM = 2048
+    LINE_SPACING = 1.2
+    PARAGRAPH_SPACING = 12
+    CODE_LABEL_SIZE = 12
+    TEXTBOX_INSETS = (0.1, 0.05)
+    CONTINUED = " (cont.)"
+
+    # Advance widths in font units for printable ASCII; anything else falls back to the default.
+    GLYPH_WIDTHS = {
+        "Calibri": dict(zip(
+            " !\"#$%&'()*+,-./0123456789:;<=>?@"
+            "ABCDEFGHIJKLMNOPQRSTUVWXYZ[\\]^_`"
+            "abcdefghijklmnopqrstuvwxyz{|}~",
+            (
+                463, 546, 821, 1038, 1038, 1472, 1405, 452, 621, 621, 1038, 1038, 511, 627, 517, 791,
+                *[1038] * 10, 548, 548, 1038, 1038, 1038, 925, 1823,
+                1185, 1114, 1092, 1260, 1000, 941, 1292, 1276, 516, 653, 1064, 861, 1751,
+                1322, 1356, 1058, 1378, 1112, 941, 998, 1314, 1162, 1822, 1063, 998, 959,
+                627, 791, 627, 1038, 1022, 593,
+                981, 1076, 866, 1076, 1019, 625, 964, 1076, 470, 490, 931, 470, 1636,
+                1076, 1080, 1076, 1076, 714, 801, 686, 1076, 925, 1464, 887, 927, 809,
+                713, 943, 713, 1038,
+            ),
+        )),
+        "Consolas": {},
+    }
+    DEFAULT_WIDTHS = {"Calibri": 1038, "Consolas": 1126}
+    # Bounded so a --stream build stays flat however many slides it fits.
+    WORD_CACHE_SIZE = 2048
+    FIT_CACHE_SIZE = 512
+
+    def __init__(self, max_lines: Optional[int] = None):
+        self.max_lines = max_lines
+        self._glyphs = {
+            font: _GlyphWidths(self.GLYPH_WIDTHS[font], default) for font, default in self.DEFAULT_WIDTHS.items()
+        }
+        self._words: _LruCache = _LruCache(self.WORD_CACHE_SIZE)
+        self._fits: _LruCache = _LruCache(self.FIT_CACHE_SIZE)
+
+    def text_width(self, text: str, font: str) -> int:
+        return sum(map(self._glyphs[font].__getitem__, text))
+
+    def line_count(self, text: str, font: str, size: int, width: float) -> int:
+        max_width = width * self.UNITS_PER_EM / size
+        space = self._glyphs[font][" "]
+        lines = 0
+        for line in text.split("\n"):
+            lines += 1
+            current = 0
+            for word in self._word_widths(line, font):
+                needed = current + space + word if current else word
+                if current and needed > max_width:
+                    lines += 1
+                    needed = word
+                if needed > max_width:
+                    lines += int(needed // max_width)
+                    needed %= max_width
+                current = needed
+        return lines
+
+    def fit_slide(self, slide: Slide, side_image: bool = False) -> Optional[TextFit]:
+        if slide.slide_type == SlideType.CODE:
+            return self.fit_code(slide.code)
+        if slide.slide_type == SlideType.CONTENT and slide.content:
+            return self.fit_bullets(slide.content, side_image)
+        return None
+
+    def fit_bullets(self, items: tuple[str, ...], side_image: bool = False) -> TextFit:
+        key = ("bullets", items, side_image)
+        fit = self._fits.get(key)
+        if fit is None:
+            width, height = self._bullet_area(side_image)
+            bullets = [PresentationBuilder.BULLET + item for item in items]
+
+            def fits(size: int) -> bool:
+                lines = sum(self.line_count(bullet, "Calibri", size, width) for bullet in bullets)
+                return self._bullets_height(lines, len(bullets), size) <= height
+
+            fit = self._fits[key] = self._shrink(fits, Theme.BODY_SIZE, Theme.BODY_MIN_SIZE)
+        return fit
+
+    def fit_code(self, code: str) -> TextFit:
+        key = ("code", code)
+        fit = self._fits.get(key)
+        if fit is None:
+            lines = code.split("\n")
+            widest = max(self.text_width(line, "Consolas") for line in lines)
+            width, _ = self._code_area()
+
+            def fits(size: int) -> bool:
+                return widest * size / self.UNITS_PER_EM <= width and len(lines) <= self.code_line_budget(size)
+
+            fit = self._fits[key] = self._shrink(fits, Theme.CODE_SIZE, Theme.CODE_MIN_SIZE)
+        return fit
+
+    def code_line_budget(self, size: int) -> int:
+        _, height = self._code_area()
+        return int((height - self.CODE_LABEL_SIZE * self.LINE_SPACING) // (size * self.LINE_SPACING))
+
+    def split(self, slides: Iterable[Slide], resolve=None) -> Iterator[Slide]:
+        for slide in slides:
+            if slide.slide_type == SlideType.CODE:
+                yield from self._split_code(slide)
+            elif slide.slide_type == SlideType.CONTENT and slide.content:
+                yield from self._split_bullets(slide, bool(slide.image_path and resolve and resolve(slide.image_path)))
+            else:
+                yield slide
+
+    def _split_code(self, slide: Slide) -> Iterator[Slide]:
+        lines = slide.code.split("\n")
+        if len(lines) <= self._line_limit(self.code_line_budget(Theme.CODE_MIN_SIZE)):
+            yield slide
+            return
+
+        pages = -(-len(lines) // self._line_limit(self.code_line_budget(Theme.CODE_SIZE)))
+        per_page = -(-len(lines) // pages)
+        for start in range(0, len(lines), per_page):
+            yield replace(
+                slide,
+                title=self._continued(slide.title) if start else slide.title,
+                content=() if start else slide.content,
+                code="\n".join(lines[start:start + per_page]),
+            )
+
+    def _split_bullets(self, slide: Slide, side_image: bool) -> Iterator[Slide]:
+        width, height = self._bullet_area(side_image)
+        lines = [
+            self.line_count(PresentationBuilder.BULLET + item, "Calibri", Theme.BODY_SIZE, width)
+            for item in slide.content
+        ]
+        limit = self._line_limit(sum(lines))
+        if sum(lines) <= limit and not self.fit_bullets(slide.content, side_image).overflow:
+            yield slide
+            return
+
+        # Fill pages at the full body size, then refill them towards an even share of the lines
+        # so the last page isn't a lone bullet. Both passes are linear in the number of bullets.
+        starts = self._paginate(lines, height, limit)
+        balanced = self._paginate(lines, height, min(limit, max(-(-sum(lines) // len(starts)), *lines)))
+        if len(balanced) == len(starts):
+            starts = balanced
+
+        for page, (start, end) in enumerate(zip(starts, starts[1:] + [len(lines)])):
+            yield replace(
+                slide,
+                title=self._continued(slide.title) if page else slide.title,
+                content=slide.content[start:end],
+                spans=slide.spans[start:end],
+                image_path="" if page else slide.image_path,
+            )
+
+    def _continued(self, title: str) -> str:
+        # An untitled slide's later pages read "(cont.)", not " (cont.)".
+        return f"{title}{self.CONTINUED}".strip()
+
+    def _paginate(self, lines: list[int], height: float, limit: int) -> list[int]:
+        starts = [0]
+        used = 0
+        for i, count in enumerate(lines):
+            bullets = i - starts[-1]
+            if bullets and (
+                used + count > limit
+                or self._bullets_height(used + count, bullets + 1, Theme.BODY_SIZE) > height
+            ):
+                starts.append(i)
+                used = 0
+            used += count
+        return starts
+
+    def _line_limit(self, budget: int) -> int:
+        return min(budget, self.max_lines) if self.max_lines else budget
+
+    @staticmethod
+    def _shrink(fits, size: int, min_size: int) -> TextFit:
+        for candidate in range(size, min_size - 1, -1):
+            if fits(candidate):
+                return TextFit(candidate)
+        return TextFit(min_size, overflow=True)
+
+    def _word_widths(self, line: str, font: str) -> tuple[int, ...]:
+        key = (font, line)
+        widths = self._words.get(key)
+        if widths is None:
+            widths = self._words[key] = tuple(self.text_width(word, font) for word in line.split())
+        return widths
+
+    def _bullet_area(self, side_image: bool) -> tuple[float, float]:
+        left, top, width, height = PresentationBuilder.CONTENT_BOX
+        if side_image:
+            width = PresentationBuilder.SIDE_TEXT_WIDTH
+        return self._text_area(width, height)
+
+    def _bullets_height(self, lines: int, bullets: int, size: int) -> float:
+        return lines * size * self.LINE_SPACING + (bullets - 1) * self.PARAGRAPH_SPACING
+
+    def _text_area(self, width: float, height: float) -> tuple[float, float]:
+        inset_x, inset_y = self.TEXTBOX_INSETS
+        return (width - 2 * inset_x) * 72, (height - 2 * inset_y) * 72
+
+    def _code_area(self) -> tuple[float, float]:
+        left, top, width, height = PresentationBuilder.CODE_BOX
+        padding = PresentationBuilder.CODE_PADDING
+        return self._text_area(width - 2 * padding, height - 2 * padding)
+
+
+class Renderer(ABC):
+    SUFFIX: ClassVar[str]
+
+    @abstractmethod
+    def build(self, chapters: list[Chapter], output_path: Path, executor: Optional[Executor] = None) -> None:
+        ...
+
+
+class PresentationBuilder(Renderer):
+    SUFFIX = ".pptx"
+    BULLET = "\u2022 "
+    SLIDE_NUMBER_NAME = "Slide Number"
+    FOOTER_NAME = "Footer"
+    FOOTER_PH = 'type="ftr" sz="quarter" idx="11"'
+    SLIDE_NUMBER_PH = 'type="sldNum" sz="quarter" idx="12"'
+    IMAGE_BOX = (9.333, 5)
+    SIDE_IMAGE_BOX = (5, 4.5)
+    CONTENT_BOX = (1, 1.8, 11.333, 5)
+    SIDE_TEXT_WIDTH = 6.5
+    CODE_BOX = (0.75, 1.8, 11.833, 5)
+    CODE_PADDING = 0.3
+
+    def __init__(
+        self,
+        title: str = "Presentation",
+        author: str = "",
+        images_dir: Optional[Path] = None,
+        cache: Optional[BuildCache] = None,
+        images: Optional[ImageAssetCache] = None,
+        assets: Optional[AssetIndex] = None,
+        optimizer: Optional[ImageOptimizer] = None,
+        packaging: Optional[Packaging] = None,
+        profiler: Optional[Profiler] = None,
+        max_lines: Optional[int] = None,
+    ):
+        self.prs = Presentation()
+        self.prs.slide_width = Inches(13.333)
+        self.prs.slide_height = Inches(7.5)
+        self.title = title
+        self.author = author
+        self.images_dir = images_dir or Path("images")
+        self.assets = assets or AssetIndex([self.images_dir])
+        self.cache = cache
+        self.images = images or ImageAssetCache()
+        self.optimizer = optimizer
+        self.profiler = profiler or Profiler(enabled=False)
+        self.fitter = TextFitter(max_lines)
+        self.overflows: list[tuple[Chapter, Slide]] = []
+        self.dedup = DedupStats()
+        self.packaging = packaging or Packaging()
+        self.save_seconds = 0.0
+        self.slide_sizes: list[tuple[int, int]] = []
+        self.chapters: list[Chapter] = []
+        self.chapter_sources: dict[str, str] = {}
+        self.repeated_slides: set[Slide] = set()
+        self._deduplicated: dict[Slide, tuple[RenderedSlide, str]] = {}
+        self.optimized_images: list[OptimizedImage] = []
+        self.slide_number = 0
+        self.total_slides = 0
+        self.rendered_chapters = 0
+        self.worker_image_hits = 0
+        self.worker_image_misses = 0
+        self._image_parts: dict[Path, object] = {}
+        self._run_styles: dict[tuple, object] = {}
+
+        self.blank_layout = self.prs.slide_layouts[6]
+        self.slide_layout = self._add_layout("Slide", code_background=False)
+        self.code_layout = self._add_layout("Code", code_background=True)
+        self._footer_shapes = [
+            self._slide_placeholder(self.SLIDE_NUMBER_NAME, self.SLIDE_NUMBER_PH),
+            self._slide_placeholder(self.FOOTER_NAME, self.FOOTER_PH),
+        ]
+
+    def build(self, chapters: list[Chapter], output_path: Path, executor: Optional[Executor] = None) -> None:
+        chapters = self.fit_chapters(chapters)
+        self.total_slides = 1 + sum(chapter.slide_count for chapter in chapters)
+
+        if self.optimizer is not None:
+            with self.profiler.span("optimize images", "optimize"):
+                self.optimize_images(chapters)
+
+        self.chapters = chapters
+        with DeckWriter(output_path, self.prs, self.profiler, self.dedup, self.packaging) as writer:
+            for rendered_slide, number in self.render_deck(chapters, executor):
+                writer.add(rendered_slide, number)
+        self.save_seconds = writer.write_seconds
+        self.slide_sizes = writer.slide_sizes
+
+    def optimize_images(self, chapters: Iterable[Chapter]) -> None:
+        targets: dict[Path, tuple[int, int]] = {}
+        for chapter in chapters:
+            for slide_data in chapter.slides:
+                if not slide_data.image_path:
+                    continue
+                resolved = self._resolve_image_path(slide_data.image_path)
+                if resolved is None:
+                    continue
+                box = self.SIDE_IMAGE_BOX if slide_data.slide_type == SlideType.CONTENT and slide_data.content else self.IMAGE_BOX
+                asset = self.images.get(resolved)
+                width, height = self._fit_size(asset.width, asset.height, *map(Inches, box))
+                current = targets.get(resolved, (0, 0))
+                targets[resolved] = (max(current[0], width), max(current[1], height))
+
+        self.optimized_images = self.optimizer.optimize(targets, self.images.work_dir)
+        for optimized in self.optimized_images:
+            if optimized.path != optimized.source:
+                self.images.set_optimized(optimized.source, optimized.path)
+
+    def build_streaming(self, parser: MarkdownParser, md_files: list[Path], output_path: Path, on_chapter=None) -> None:
+        if self.optimizer is not None:
+            with self.profiler.span("optimize images", "optimize"):
+                self.optimize_images(parser.parse_file(md_file) for md_file in md_files)
+
+        with DeckWriter(output_path, self.prs, self.profiler, self.dedup, self.packaging) as writer:
+            self.slide_number = 0
+            writer.add(self._render_slides(self._add_title_slide)[0], 1)
+
+            for md_file in parser.sort_files(md_files):
+                with parser.open_chapter(md_file, mapped=True) as (chapter, slides):
+                    first_number = self.slide_number + 1
+                    for offset, rendered_slide in enumerate(self._render_slides(self._add_chapter_header, chapter)):
+                        writer.add(rendered_slide, first_number + offset)
+
+                    slide_count = 0
+                    for slide_data in self._fit_slides(chapter, slides):
+                        rendered_slide = self._render_slides(self._add_slide, slide_data, chapter.title)[0]
+                        writer.add(rendered_slide, self.slide_number)
+                        slide_count += 1
+                    self._image_parts.clear()
+
+                self.total_slides = self.slide_number
+                if on_chapter is not None:
+                    on_chapter(chapter, slide_count)
+        self.save_seconds = writer.write_seconds
+
+    def fit_chapters(self, chapters: list[Chapter]) -> list[Chapter]:
+        fitted = []
+        for chapter in chapters:
+            slides = list(self._fit_slides(chapter, chapter.slides))
+            fitted.append(chapter if len(slides) == len(chapter.slides) else replace(chapter, slides=slides))
+        return fitted
+
+    def _fit_slides(self, chapter: Chapter, slides: Iterable[Slide]) -> Iterator[Slide]:
+        for slide_data in self.fitter.split(slides, self._resolve_image_path):
+            side_image = bool(
+                slide_data.content and slide_data.image_path and self._resolve_image_path(slide_data.image_path)
+            )
+            fit = self.fitter.fit_slide(slide_data, side_image)
+            if fit is not None and fit.overflow:
+                self.overflows.append((chapter, slide_data))
+            yield slide_data
+
+    @property
+    def image_hits(self) -> int:
+        return self.images.hits + self.worker_image_hits
+
+    @property
+    def image_misses(self) -> int:
+        return self.images.misses + self.worker_image_misses
+
+    def render_chapter(self, chapter: Chapter, first_number: int) -> list[RenderedSlide]:
+        self.slide_number = first_number - 1
+        rendered = self._render_slides(self._add_chapter_header, chapter)
+        for slide_data in chapter.slides:
+            rendered.append(self._render_slide(slide_data, chapter.title))
+        self._image_parts.clear()
+        return rendered
+
+    def render_deck(self, chapters: list[Chapter], executor: Optional[Executor] = None):
+        counts = collections.Counter(slide_data for chapter in chapters for slide_data in chapter.slides)
+        self.repeated_slides = {slide_data for slide_data, count in counts.items() if count > 1}
+        self.slide_number = 0
+        yield self._render_slides(self._add_title_slide)[0], 1
+
+        plan = []
+        number = self.slide_number + 1
+        for chapter in chapters:
+            key = self._chapter_cache_key(chapter) if self.cache is not None else None
+            rendered = self.cache.get(key) if key is not None else None
+            if rendered is None and executor is not None:
+                repeated = self.repeated_slides.intersection(chapter.slides)
+                rendered = executor.submit(
+                    _render_chapter,
+                    (
+                        self.title, self.author, self.assets, self.images.work_dir, self.images.optimized,
+                        chapter, number, repeated,
+                    ),
+                )
+                self.rendered_chapters += 1
+            plan.append((chapter, number, key, rendered))
+            number += chapter.slide_count
+
+        for chapter, first_number, key, rendered in plan:
+            if rendered is None:
+                self.chapter_sources[chapter.filename] = "rendered"
+                self.rendered_chapters += 1
+                rendered = self.render_chapter(chapter, first_number)
+                if key is not None:
+                    self.cache.put(key, rendered)
+            elif not isinstance(rendered, Future):
+                self.chapter_sources[chapter.filename] = "cache"
+            else:
+                self.chapter_sources[chapter.filename] = "worker"
+                rendered, image_hits, image_misses, reused_slides = rendered.result()
+                self.worker_image_hits += image_hits
+                self.worker_image_misses += image_misses
+                self.dedup.reused_slides += reused_slides
+                if key is not None:
+                    self.cache.put(key, rendered)
+
+            for offset, rendered_slide in enumerate(rendered):
+                yield rendered_slide, first_number + offset
+
+        self.slide_number = number - 1
+
+    def _render_slides(self, add_slides, *args) -> list[RenderedSlide]:
+        start = len(self.prs.slides)
+        add_slides(*args)
+
+        slides = list(self.prs.slides)[start:]
+        rendered = [self._extract_slide(slide) for slide in slides]
+
+        sldIdLst = self.prs.slides._sldIdLst
+        for sldId in list(sldIdLst)[start:]:
+            self.prs.part.drop_rel(sldId.rId)
+            sldIdLst.remove(sldId)
+
+        return rendered
+
+    def _render_slide(self, slide_data: Slide, chapter_title: str) -> RenderedSlide:
+        if slide_data not in self.repeated_slides:
+            return self._render_slides(self._add_slide, slide_data, chapter_title)[0]
+
+        if slide_data not in self._deduplicated:
+            rendered = self._render_slides(self._add_slide, slide_data, chapter_title)[0]
+            self._deduplicated[slide_data] = (rendered, chapter_title)
+            return rendered
+
+        self.slide_number += 1
+        self.dedup.reused_slides += 1
+        rendered, rendered_title = self._deduplicated[slide_data]
+        if rendered_title == chapter_title:
+            return rendered
+        return replace(rendered, xml=_set_shape_text(rendered.xml, self.FOOTER_NAME, chapter_title))
+
+    def _chapter_cache_key(self, chapter: Chapter) -> str:
+        parts = [
+            "render", _theme_fingerprint(), repr(chapter),
+            serialize_part_xml(self.slide_layout._element), serialize_part_xml(self.code_layout._element),
+        ]
+        if self.optimizer is not None:
+            parts.append(f"optimize:{self.optimizer.max_dpi}:{self.optimizer.jpeg_quality}")
+        for slide_data in chapter.slides:
+            if slide_data.image_path:
+                resolved = self._resolve_image_path(slide_data.image_path)
+                parts.append(self.cache.image_digest(resolved) if resolved else "missing")
+        return BuildCache.key(*parts)
+
+    def _extract_slide(self, slide) -> RenderedSlide:
+        images = {
+            rId: rel.target_part.blob
+            for rId, rel in slide.part.rels.items()
+            if rel.reltype == RT.IMAGE
+        }
+        layout = slide.slide_layout.part.partname.relative_ref(slide.part.partname.baseURI)
+        return RenderedSlide(xml=serialize_part_xml(slide._element), layout=layout, images=images)
+
+    def _add_layout(self, name: str, code_background: bool):
+        package = self.prs.part.package
+        master = self.prs.slide_master
+        element = parse_xml(
+            f'<p:sldLayout {nsdecls("a", "p", "r")} preserve="1"><p:cSld name="{name}"><p:spTree>'
+            '<p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr><p:grpSpPr/>'
+            '</p:spTree></p:cSld><p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sldLayout>'
+        )
+        part = SlideLayoutPart(
+            package.next_partname("/ppt/slideLayouts/slideLayout%d.xml"), CT.PML_SLIDE_LAYOUT, package, element
+        )
+        part.relate_to(master.part, RT.SLIDE_MASTER)
+        layout_ids = master._element.get_or_add_sldLayoutIdLst()
+        etree.SubElement(layout_ids, qn("p:sldLayoutId"), {
+            "id": str(max(int(layout_id.get("id")) for layout_id in layout_ids) + 1),
+            qn("r:id"): master.part.relate_to(part, RT.SLIDE_LAYOUT),
+        })
+
+        layout = part.slide_layout
+        shapes = SlideShapes(element.cSld.spTree, layout)
+        line = shapes.add_shape(
+            MSO_SHAPE.RECTANGLE,
+            Inches(0), Inches(0), Inches(13.333), Inches(0.08)
+        )
+        line.fill.solid()
+        line.fill.fore_color.rgb = RGBColor.from_string(Theme.ACCENT)
+        line.line.fill.background()
+
+        if code_background:
+            code_bg = shapes.add_shape(MSO_SHAPE.ROUNDED_RECTANGLE, *map(Inches, self.CODE_BOX))
+            code_bg.fill.solid()
+            code_bg.fill.fore_color.rgb = RGBColor.from_string(Theme.BG_CODE)
+            code_bg.line.fill.background()
+
+        self._add_layout_placeholder(
+            shapes, "Title", 'type="title"',
+            (Inches(0.5), Inches(0.3), Inches(12.333), Inches(1)),
+            Theme.TITLE_SIZE, Theme.PRIMARY, bold=True
+        )
+        self._add_layout_placeholder(
+            shapes, self.FOOTER_NAME, self.FOOTER_PH,
+            (Inches(0.25), Inches(7), Inches(4), Inches(0.4)),
+            Theme.FOOTER_SIZE, Theme.TEXT_MUTED
+        )
+        self._add_layout_placeholder(
+            shapes, self.SLIDE_NUMBER_NAME, self.SLIDE_NUMBER_PH,
+            (Inches(12.333), Inches(7), Inches(0.75), Inches(0.4)),
+            Theme.FOOTER_SIZE, Theme.TEXT_MUTED, align="r"
+        )
+        return layout
+
+    @staticmethod
+    def _slide_placeholder(name: str, ph: str):
+        return parse_xml(
+            f'<p:sp {nsdecls("a", "p")}><p:nvSpPr><p:cNvPr id="0" name="{name}"/>'
+            f'<p:cNvSpPr><a:spLocks noGrp="1"/></p:cNvSpPr><p:nvPr><p:ph {ph}/></p:nvPr></p:nvSpPr>'
+            '<p:spPr/><p:txBody><a:bodyPr/><a:lstStyle/><a:p><a:r><a:t></a:t></a:r></a:p></p:txBody></p:sp>'
+        )
+
+    def _add_layout_placeholder(
+        self, shapes, name: str, ph: str, box, size: int, color: str, bold: bool = False, align: str = "l"
+    ) -> None:
+        left, top, width, height = box
+        shapes._spTree.append(parse_xml(
+            f'<p:sp {nsdecls("a", "p")}><p:nvSpPr>'
+            f'<p:cNvPr id="{shapes._next_shape_id}" name="{name}"/>'
+            '<p:cNvSpPr><a:spLocks noGrp="1"/></p:cNvSpPr>'
+            f'<p:nvPr><p:ph {ph}/></p:nvPr></p:nvSpPr>'
+            f'<p:spPr><a:xfrm><a:off x="{left}" y="{top}"/><a:ext cx="{width}" cy="{height}"/></a:xfrm></p:spPr>'
+            '<p:txBody><a:bodyPr wrap="none" anchor="t"><a:spAutoFit/></a:bodyPr><a:lstStyle>'
+            f'<a:lvl1pPr marL="0" indent="0" algn="{align}">'
+            '<a:lnSpc><a:spcPct val="100000"/></a:lnSpc><a:spcBef><a:spcPts val="0"/></a:spcBef><a:buNone/>'
+            f'<a:defRPr sz="{size * 100}" b="{int(bold)}">'
+            f'<a:solidFill><a:srgbClr val="{color}"/></a:solidFill><a:latin typeface="+mn-lt"/>'
+            '</a:defRPr></a:lvl1pPr></a:lstStyle><a:p><a:endParaRPr lang="en-US"/></a:p></p:txBody></p:sp>'
+        ))
+
+    def _add_title_slide(self) -> None:
+        with self._slide_span(self.title, "", "title"):
+            self.slide_number += 1
+            slide = self.prs.slides.add_slide(self.blank_layout)
+            self._set_slide_background(slide, RGBColor.from_string(Theme.PRIMARY))
+
+            title_box = slide.shapes.add_textbox(
+                Inches(0.5), Inches(2.5), Inches(12.333), Inches(1.5)
+            )
+            tf = title_box.text_frame
+            p = tf.paragraphs[0]
+            p.text = self.title
+            p.font.size = Pt(54)
+            p.font.bold = True
+            p.font.color.rgb = RGBColor.from_string(Theme.TEXT_LIGHT)
+            p.alignment = PP_ALIGN.CENTER
+
+            if self.author:
+                author_box = slide.shapes.add_textbox(
+                    Inches(0.5), Inches(4.5), Inches(12.333), Inches(0.5)
+                )
+                tf = author_box.text_frame
+                p = tf.paragraphs[0]
+                p.text = self.author
+                p.font.size = Pt(20)
+                p.font.color.rgb = RGBColor.from_string(Theme.TEXT_LIGHT)
+                p.alignment = PP_ALIGN.CENTER
+
+    def _add_chapter_header(self, chapter: Chapter) -> None:
+        with self._slide_span(f"Chapter {chapter.order}", chapter.title, "section"):
+            self._add_section_slide(chapter)
+
+        if chapter.agenda:
+            with self._slide_span("Agenda", chapter.title, "agenda"):
+                self._add_agenda_slide(chapter)
+
+    def _add_section_slide(self, chapter: Chapter) -> None:
+        self.slide_number += 1
+        slide = self.prs.slides.add_slide(self.blank_layout)
+        self._set_slide_background(slide, RGBColor.from_string(Theme.SECONDARY))
+
+        num_box = slide.shapes.add_textbox(
+            Inches(0.5), Inches(2), Inches(12.333), Inches(0.8)
+        )
+        tf = num_box.text_frame
+        p = tf.paragraphs[0]
+        p.text = f"Chapter {chapter.order}"
+        p.font.size = Pt(24)
+        p.font.color.rgb = RGBColor.from_string(Theme.ACCENT)
+        p.alignment = PP_ALIGN.CENTER
+
+        title_box = slide.shapes.add_textbox(
+            Inches(0.5), Inches(2.8), Inches(12.333), Inches(1.5)
+        )
+        tf = title_box.text_frame
+        p = tf.paragraphs[0]
+        p.text = chapter.title
+        p.font.size = Pt(48)
+        p.font.bold = True
+        p.font.color.rgb = RGBColor.from_string(Theme.TEXT_LIGHT)
+        p.alignment = PP_ALIGN.CENTER
+
+    def _add_agenda_slide(self, chapter: Chapter) -> None:
+        self.slide_number += 1
+        slide = self.prs.slides.add_slide(self.slide_layout)
+        self._add_slide_header(slide, "Agenda")
+
+        content_box = slide.shapes.add_textbox(
+            Inches(1), Inches(2), Inches(11.333), Inches(4.5)
+        )
+        tf = content_box.text_frame
+        tf.word_wrap = True
+
+        p = tf.paragraphs[0]
+        p.text = chapter.agenda
+        p.font.size = Pt(24)
+        p.font.color.rgb = RGBColor.from_string(Theme.TEXT_DARK)
+        p.alignment = PP_ALIGN.LEFT
+
+        self._add_slide_footer(slide, chapter.title)
+
+    def _add_slide(self, slide_data: Slide, chapter_title: str) -> None:
+        with self._slide_span(
+            slide_data.title, chapter_title, slide_data.slide_type.name.lower(), line=slide_data.source_line
+        ):
+            self.slide_number += 1
+
+            if slide_data.slide_type == SlideType.CODE:
+                self._add_code_slide(slide_data, chapter_title)
+            elif slide_data.slide_type == SlideType.IMAGE:
+                self._add_image_slide(slide_data, chapter_title)
+            else:
+                self._add_content_slide(slide_data, chapter_title)
+
+    def _slide_span(self, title: str, chapter_title: str, slide_type: str, **args):
+        return self.profiler.span(
+            title or "(no title)", "render",
+            chapter=chapter_title, number=self.slide_number + 1, type=slide_type, **args,
+        )
+
+    def _add_content_slide(self, slide_data: Slide, chapter_title: str) -> None:
+        slide = self.prs.slides.add_slide(self.slide_layout)
+        self._add_slide_header(slide, slide_data.title)
+
+        resolved_image = None
+        if slide_data.image_path:
+            resolved_image = self._resolve_image_path(slide_data.image_path)
+
+        content_left, content_top, content_width, content_height = map(Inches, self.CONTENT_BOX)
+        side_image = bool(resolved_image and slide_data.content)
+        if side_image:
+            content_width = Inches(self.SIDE_TEXT_WIDTH)
+
+        if slide_data.content:
+            content_box = slide.shapes.add_textbox(
+                content_left, content_top, content_width, content_height
+            )
+            tf = content_box.text_frame
+            tf.word_wrap = True
+            size = self.fitter.fit_bullets(slide_data.content, side_image).size
+
+            for i, (item, spans) in enumerate(zip(slide_data.content, slide_data.spans)):
+                if i == 0:
+                    p = tf.paragraphs[0]
+                else:
+                    p = tf.add_paragraph()
+
+                self._add_inline_runs(p, item, spans, size, Theme.TEXT_DARK, prefix=self.BULLET)
+                p.space_after = Pt(12)
+                p.level = 0
+
+        if resolved_image:
+            self._place_image(
+                slide, resolved_image,
+                Inches(7.8), Inches(2),
+                *map(Inches, self.SIDE_IMAGE_BOX)
+            )
+
+        self._add_slide_footer(slide, chapter_title)
+
+    def _add_inline_runs(
+        self, paragraph, text: str, spans: InlineSpans, size: int, color: str, prefix: str = ""
+    ) -> None:
+        if not spans:
+            self._add_run(paragraph, prefix + text, self._run_style(size, color))
+            return
+
+        for i in range(0, len(spans), 3):
+            start, end, style = spans[i:i + 3]
+            run_text = text[start:end]
+            if i == 0 and prefix:
+                if style == InlineStyle.PLAIN:
+                    run_text = prefix + run_text
+                else:
+                    self._add_run(paragraph, prefix, self._run_style(size, color))
+
+            bold, italic = InlineStyle.BOLD in style, InlineStyle.ITALIC in style
+            if InlineStyle.CODE in style:
+                self._add_run(paragraph, run_text, self._run_style(size, Theme.ACCENT, bold, italic, font="Consolas"))
+            else:
+                self._add_run(paragraph, run_text, self._run_style(size, color, bold, italic))
+
+    def _add_code_runs(self, paragraph, code: str, spans: CodeSpans, size: int) -> None:
+        for i in range(0, len(spans) or 3, 3):
+            start, end, color = spans[i:i + 3] if spans else (0, len(code), Theme.TEXT_LIGHT)
+            style = self._run_style(size, color, font="Consolas")
+            for j, line in enumerate(code[start:end].split("\n")):
+                if j:
+                    paragraph.add_line_break()
+                if line:
+                    self._add_run(paragraph, line, style)
+
+    def _add_run(self, paragraph, text: str, style) -> None:
+        run = paragraph.add_run()
+        run.text = text
+        run._r.insert(0, copy.deepcopy(style))
+
+    def _run_style(self, size: int, color: str, bold: bool = False, italic: bool = False, font: Optional[str] = None):
+        key = (size, color, bold, italic, font)
+        style = self._run_styles.get(key)
+        if style is None:
+            style = parse_xml(f'<a:rPr {nsdecls("a")}/>')
+            run_font = Font(style)
+            run_font.size = Pt(size)
+            if font:
+                run_font.name = font
+            run_font.color.rgb = RGBColor.from_string(color)
+            if bold:
+                run_font.bold = True
+            if italic:
+                run_font.italic = True
+            self._run_styles[key] = style
+        return style
+
+    def _add_code_slide(self, slide_data: Slide, chapter_title: str) -> None:
+        slide = self.prs.slides.add_slide(self.code_layout)
+        self._add_slide_header(slide, slide_data.title)
+
+        code_left, code_top, code_width, code_height = map(Inches, self.CODE_BOX)
+
+        padding = Inches(self.CODE_PADDING)
+        code_box = slide.shapes.add_textbox(
+            code_left + padding,
+            code_top + padding,
+            code_width - 2 * padding,
+            code_height - 2 * padding
+        )
+        tf = code_box.text_frame
+        tf.word_wrap = False
+
+        lang_label = slide_data.code_language.upper() if slide_data.code_language else "CODE"
+
+        p = tf.paragraphs[0]
+        p.text = f"// {lang_label}"
+        p.font.size = Pt(TextFitter.CODE_LABEL_SIZE)
+        p.font.color.rgb = RGBColor.from_string(Theme.TEXT_MUTED)
+        p.font.name = "Consolas"
+
+        size = self.fitter.fit_code(slide_data.code).size
+        p = tf.add_paragraph()
+        p.font.size = Pt(size)
+        p.font.color.rgb = RGBColor.from_string(Theme.TEXT_LIGHT)
+        p.font.name = "Consolas"
+        self._add_code_runs(p, slide_data.code, highlight_code(slide_data.code, slide_data.code_language), size)
+
+        self._add_slide_footer(slide, chapter_title)
+
+    def _add_image_slide(self, slide_data: Slide, chapter_title: str) -> None:
+        slide = self.prs.slides.add_slide(self.slide_layout)
+        self._add_slide_header(slide, slide_data.title)
+
+        resolved = self._resolve_image_path(slide_data.image_path)
+        if resolved:
+            self._place_image(
+                slide, resolved,
+                Inches(2), Inches(2),
+                *map(Inches, self.IMAGE_BOX)
+            )
+        else:
+            placeholder = slide.shapes.add_textbox(
+                Inches(2), Inches(3), Inches(9.333), Inches(2)
+            )
+            tf = placeholder.text_frame
+            p = tf.paragraphs[0]
+            p.text = f"[Image not found: {slide_data.image_path}]"
+            p.font.size = Pt(18)
+            p.font.color.rgb = RGBColor.from_string(Theme.TEXT_MUTED)
+            p.alignment = PP_ALIGN.CENTER
+
+        self._add_slide_footer(slide, chapter_title)
+
+    def _place_image(self, slide, image_path: Path, left, top, max_width, max_height) -> None:
+        with self.profiler.span(image_path.name, "image"):
+            asset = self.images.get(image_path)
+            width, height = self._fit_size(asset.width, asset.height, max_width, max_height)
+
+            image_part = self._image_parts.get(asset.path)
+            if image_part is None:
+                image_part, rId = slide.part.get_or_add_image_part(str(asset.path))
+                self._image_parts[asset.path] = image_part
+            else:
+                rId = slide.part.relate_to(image_part, RT.IMAGE)
+
+            slide.shapes._add_pic_from_image_part(image_part, rId, left, top, width, height)
+
+    @staticmethod
+    def _fit_size(img_w: int, img_h: int, max_width: int, max_height: int) -> tuple[int, int]:
+        aspect = img_w / img_h
+        width = max_width
+        height = int(max_width / aspect)
+        if height > max_height:
+            height = max_height
+            width = int(max_height * aspect)
+        return width, height
+
+    def _resolve_image_path(self, raw_path: str) -> Optional[Path]:
+        return self.assets.resolve(raw_path)
+
+    def _add_slide_header(self, slide, title: str) -> None:
+        slide.shapes.title.text = title
+
+    def _add_slide_footer(self, slide, chapter_title: str) -> None:
+        shape_id = slide.shapes._next_shape_id
+        for template, text in zip(self._footer_shapes, (f"{self.slide_number}", chapter_title)):
+            sp = copy.deepcopy(template)
+            sp.nvSpPr.cNvPr.id = shape_id
+            sp.find(f".//{qn('a:t')}").text = text
+            slide.shapes._spTree.append(sp)
+            shape_id += 1
+
+    def _set_slide_background(self, slide, color: RGBColor) -> None:
+        background = slide.background
+        fill = background.fill
+        fill.solid()
+        fill.fore_color.rgb = color
+
+
+class HtmlRenderer(Renderer):
+    SUFFIX = ".html"
+    # Lengths are in container query units of the slide, 7.5cqw to the inch, so every slide scales with the page.
+    UNITS_PER_INCH = 100 / 13.333
+    STYLE = """
+body { margin: 0; padding: 2vw 0; background: #{BG_LIGHT}; font-family: Calibri, Carlito, "Segoe UI", sans-serif; }
+.slide { position: relative; width: min(96vw, 170vh); aspect-ratio: 16 / 9; margin: 0 auto 2vw; overflow: hidden;
+  container-type: inline-size; background: #fff; box-shadow: 0 0.2vw 1vw rgba(0, 0, 0, 0.15); }
+.slide > * { position: absolute; margin: 0; box-sizing: border-box; }
+.title, .section { color: #{TEXT_LIGHT}; }
+.title { background: #{PRIMARY}; }
+.section { background: #{SECONDARY}; }
+.center { left: 0; right: 0; text-align: center; white-space: nowrap; }
+.bar { left: 0; top: 0; width: 100%; height: {BAR}; background: #{ACCENT}; }
+h2 { color: #{PRIMARY}; white-space: nowrap; }
+.footer { color: #{TEXT_MUTED}; white-space: nowrap; }
+.number { text-align: right; }
+ul { list-style: none; padding: 0; color: #{TEXT_DARK}; line-height: 1.2; }
+code, pre, .label { font-family: Consolas, "DejaVu Sans Mono", monospace; }
+ul code { color: #{ACCENT}; }
+.code { background: #{BG_CODE}; border-radius: {RADIUS}; }
+pre { margin: 0; color: #{TEXT_LIGHT}; line-height: 1.2; white-space: pre; overflow: hidden; }
+.label { color: #{TEXT_MUTED}; }
+img { object-fit: contain; object-position: left top; }
+.missing { color: #{TEXT_MUTED}; text-align: center; }
+"""
+    STYLE_COLORS = ("BG_LIGHT", "TEXT_LIGHT", "TEXT_DARK", "TEXT_MUTED", "PRIMARY", "SECONDARY", "ACCENT", "BG_CODE")
+
+    def __init__(
+        self,
+        title: str = "Presentation",
+        author: str = "",
+        assets: Optional[AssetIndex] = None,
+        max_lines: Optional[int] = None,
+    ):
+        self.title = title
+        self.author = author
+        self.assets = assets or AssetIndex([Path("images")])
+        self.fitter = TextFitter(max_lines)
+        self.slide_number = 0
+        self.media: dict[Path, str] = {}
+
+    def build(self, chapters: list[Chapter], output_path: Path, executor: Optional[Executor] = None) -> None:
+        media_dir = output_path.with_name(output_path.stem + "_files")
+        self.slide_number = 0
+        self.media = {}
+        style = self.STYLE.replace("{BAR}", self._in(0.08)).replace("{RADIUS}", self._in(5 / 6))
+        for name in self.STYLE_COLORS:
+            style = style.replace("{" + name + "}", getattr(Theme, name))
+
+        parts = [
+            f'<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n'
+            f'<meta name="viewport" content="width=device-width, initial-scale=1">\n'
+            f'<title>{self._escape(self.title)}</title>\n<style>{style}</style>\n</head>\n<body>\n'
+        ]
+        self._add_title_slide(parts)
+        for chapter in chapters:
+            self._add_section_slide(parts, chapter)
+            if chapter.agenda:
+                self._add_slide(parts, chapter, "Agenda", [
+                    self._box("ul", (1, 2, 11.333, 4.5), 24, f"<li>{self._escape(chapter.agenda)}</li>"),
+                ])
+            for slide_data in self.fitter.split(chapter.slides, self.assets.resolve):
+                self._add_content(parts, chapter, slide_data, media_dir)
+        parts.append("</body>\n</html>\n")
+
+        tmp = output_path.with_name(f".{output_path.name}.{os.getpid()}{self.SUFFIX}.tmp")
+        tmp.write_text("".join(parts), encoding="utf-8")
+        os.replace(tmp, output_path)
+
+    def _add_title_slide(self, parts: list[str]) -> None:
+        self.slide_number += 1
+        parts.append(f'<section class="slide title" id="slide-{self.slide_number}">')
+        parts.append(self._box("h1", (0.5, 2.5, 12.333, None), 54, self._escape(self.title), "center"))
+        if self.author:
+            parts.append(self._box("p", (0.5, 4.5, 12.333, None), 20, self._escape(self.author), "center"))
+        parts.append("</section>\n")
+
+    def _add_section_slide(self, parts: list[str], chapter: Chapter) -> None:
+        self.slide_number += 1
+        parts.append(f'<section class="slide section" id="slide-{self.slide_number}">')
+        parts.append(self._box(
+            "p", (0.5, 2, 12.333, None), 24, f'<span style="color:#{Theme.ACCENT}">Chapter {chapter.order}</span>', "center",
+        ))
+        parts.append(self._box("h1", (0.5, 2.8, 12.333, None), 48, self._escape(chapter.title), "center"))
+        parts.append("</section>\n")
+
+    def _add_content(self, parts: list[str], chapter: Chapter, slide_data: Slide, media_dir: Path) -> None:
+        body = []
+        if slide_data.slide_type == SlideType.CODE:
+            left, top, width, height = PresentationBuilder.CODE_BOX
+            padding = PresentationBuilder.CODE_PADDING
+            label = slide_data.code_language.upper() if slide_data.code_language else "CODE"
+            size = self.fitter.fit_code(slide_data.code).size
+            body.append(self._box("div", (left, top, width, height), None, "", "code"))
+            inner = (left + padding, top + padding, width - 2 * padding, height - 2 * padding)
+            body.append(self._box(
+                "div", inner, None,
+                f'<div class="label" style="font-size:{self._pt(TextFitter.CODE_LABEL_SIZE)}">// {self._escape(label)}</div>'
+                f'<pre style="font-size:{self._pt(size)}">{self._code(slide_data.code, slide_data.code_language)}</pre>',
+            ))
+        elif slide_data.slide_type == SlideType.IMAGE:
+            resolved = self.assets.resolve(slide_data.image_path)
+            if resolved:
+                body.append(self._image(resolved, (2, 2, *PresentationBuilder.IMAGE_BOX), media_dir))
+            else:
+                body.append(self._box(
+                    "p", (2, 3, 9.333, 2), 18, self._escape(f"[Image not found: {slide_data.image_path}]"), "missing",
+                ))
+        else:
+            resolved = self.assets.resolve(slide_data.image_path) if slide_data.image_path else None
+            side_image = bool(resolved and slide_data.content)
+            if slide_data.content:
+                left, top, width, height = PresentationBuilder.CONTENT_BOX
+                if side_image:
+                    width = PresentationBuilder.SIDE_TEXT_WIDTH
+                size = self.fitter.fit_bullets(slide_data.content, side_image).size
+                items = "".join(
+                    f'<li style="margin-bottom:{self._pt(TextFitter.PARAGRAPH_SPACING)}">'
+                    f"{PresentationBuilder.BULLET}{self._inline(item, spans)}</li>"
+                    for item, spans in zip(slide_data.content, slide_data.spans)
+                )
+                body.append(self._box("ul", (left, top, width, height), size, items))
+            if resolved:
+                body.append(self._image(resolved, (7.8, 2, *PresentationBuilder.SIDE_IMAGE_BOX), media_dir))
+        self._add_slide(parts, chapter, slide_data.title, body)
+
+    def _add_slide(self, parts: list[str], chapter: Chapter, title: str, body: list[str]) -> None:
+        self.slide_number += 1
+        parts.append(f'<section class="slide" id="slide-{self.slide_number}"><div class="bar"></div>')
+        parts.append(self._box("h2", (0.5, 0.3, 12.333, 1), Theme.TITLE_SIZE, self._escape(title)))
+        parts.extend(body)
+        parts.append(self._box("p", (0.25, 7, 4, 0.4), Theme.FOOTER_SIZE, self._escape(chapter.title), "footer"))
+        parts.append(self._box("p", (12.333, 7, 0.75, 0.4), Theme.FOOTER_SIZE, str(self.slide_number), "footer number"))
+        parts.append("</section>\n")
+
+    def _inline(self, text: str, spans: InlineSpans) -> str:
+        if not spans:
+            return self._escape(text)
+        runs = []
+        for start, end, style in zip(spans[::3], spans[1::3], spans[2::3]):
+            run = self._escape(text[start:end])
+            if InlineStyle.CODE in style:
+                run = f"<code>{run}</code>"
+            if InlineStyle.ITALIC in style:
+                run = f"<em>{run}</em>"
+            if InlineStyle.BOLD in style:
+                run = f"<strong>{run}</strong>"
+            runs.append(run)
+        return "".join(runs)
+
+    def _code(self, code: str, language: str) -> str:
+        spans = highlight_code(code, language)
+        if not spans:
+            return self._escape(code)
+        return "".join(
+            f'<span style="color:#{color}">{self._escape(code[start:end])}</span>'
+            for start, end, color in zip(spans[::3], spans[1::3], spans[2::3])
+        )
+
+    def _image(self, path: Path, box: tuple[float, float, float, float], media_dir: Path) -> str:
+        name = self.media.get(path)
+        if name is None:
+            digest = hashlib.sha1(str(path.resolve()).encode("utf-8")).hexdigest()[:12]
+            name = self.media[path] = f"{path.stem}-{digest}{path.suffix.lower()}"
+            media_dir.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(path, media_dir / name)
+        left, top, width, height = box
+        src = html.escape(f"{media_dir.name}/{name}")
+        return f'<img src="{src}" alt="" style="{self._position((left, top, width, height))}">'
+
+    def _box(self, tag: str, box: tuple, size: Optional[int], content: str, css_class: str = "") -> str:
+        attributes = f' class="{css_class}"' if css_class else ""
+        style = self._position(box)
+        if size is not None:
+            style += f";font-size:{self._pt(size)}"
+        return f'<{tag}{attributes} style="{style}">{content}</{tag}>'
+
+    def _position(self, box: tuple) -> str:
+        left, top, width, height = box
+        inset_x, inset_y = TextFitter.TEXTBOX_INSETS
+        style = f"left:{self._in(left)};top:{self._in(top)};padding:{self._in(inset_y)} {self._in(inset_x)}"
+        if width is not None:
+            style += f";width:{self._in(width)}"
+        if height is not None:
+            style += f";height:{self._in(height)}"
+        return style
+
+    def _in(self, inches: float) -> str:
+        return f"{inches * self.UNITS_PER_INCH:.3f}cqw"
+
+    def _pt(self, points: float) -> str:
+        return self._in(points / 72)
+
+    @staticmethod
+    def _escape(text: str) -> str:
+        return html.escape(text, quote=False)
+
+
+class SlideRasterizer:
+    SLIDE_SIZE = (13.333, 7.5)
+    SHEET_TILE_WIDTH = 320
+    SHEET_GAP = 16
+    FOOTER_BOX = (0.25, 7, 4, 0.4)
+    SLIDE_NUMBER_BOX = (12.333, 7, 0.75, 0.4)
+    # The deck's fonts first, then metric-compatible and common fallbacks, then Pillow's built-in font.
+    FONT_FILES = {
+        "Calibri": ("calibri.ttf", "Carlito-Regular.ttf", "DejaVuSans.ttf", "Arial.ttf"),
+        "Calibri Bold": ("calibrib.ttf", "Carlito-Bold.ttf", "DejaVuSans-Bold.ttf", "Arial Bold.ttf"),
+        "Calibri Italic": ("calibrii.ttf", "Carlito-Italic.ttf", "DejaVuSans-Oblique.ttf", "Arial Italic.ttf"),
+        "Calibri Bold Italic": (
+            "calibriz.ttf", "Carlito-BoldItalic.ttf", "DejaVuSans-BoldOblique.ttf", "Arial Bold Italic.ttf",
+        ),
+        "Consolas": ("consola.ttf", "DejaVuSansMono.ttf", "Menlo.ttc", "Courier New.ttf"),
+    }
+    WORD_PATTERN = re.compile(r'\s+|\S+')
+
+    def __init__(
+        self,
+        title: str = "Presentation",
+        author: str = "",
+        width: int = 640,
+        assets: Optional[AssetIndex] = None,
+        max_lines: Optional[int] = None,
+    ):
+        self.title = title
+        self.author = author
+        self.width = width
+        self.ppi = width / self.SLIDE_SIZE[0]
+        self.size = (width, round(self.SLIDE_SIZE[1] * self.ppi))
+        self.assets = assets or AssetIndex([Path("images")])
+        self.fitter = TextFitter(max_lines)
+        self._fonts: dict[tuple[str, int], object] = {}
+
+    def fit(self, chapter: Chapter) -> Chapter:
+        slides = list(self.fitter.split(chapter.slides, self.assets.resolve))
+        return chapter if len(slides) == len(chapter.slides) else replace(chapter, slides=slides)
+
+    def pages(self, chapter: Chapter) -> list[tuple[SlideType, Optional[Slide]]]:
+        pages: list[tuple[SlideType, Optional[Slide]]] = [(SlideType.SECTION, None)]
+        if chapter.agenda:
+            pages.append((SlideType.AGENDA, None))
+        pages.extend((slide_data.slide_type, slide_data) for slide_data in chapter.slides)
+        return pages
+
+    def key(self, chapter: Optional[Chapter], slide_type: SlideType, slide_data: Optional[Slide], cache: BuildCache) -> str:
+        parts = ["thumb", _theme_fingerprint(), str(self.width), slide_type.name]
+        if slide_type == SlideType.TITLE:
+            parts += [self.title, self.author]
+        elif slide_type == SlideType.SECTION:
+            parts += [str(chapter.order), chapter.title]
+        elif slide_type == SlideType.AGENDA:
+            parts += [chapter.title, chapter.agenda]
+        else:
+            parts += [chapter.title, repr(slide_data)]
+            if slide_data.image_path:
+                resolved = self.assets.resolve(slide_data.image_path)
+                parts.append(cache.image_digest(resolved) if resolved else "missing")
+        return BuildCache.key(*parts)
+
+    @property
+    def tile_size(self) -> tuple[int, int]:
+        return self.SHEET_TILE_WIDTH, round(self.SHEET_TILE_WIDTH * self.size[1] / self.size[0])
+
+    def render(self, chapter: Optional[Chapter], slide_type: SlideType, slide_data: Optional[Slide]) -> tuple[bytes, bytes]:
+        background = {SlideType.TITLE: Theme.PRIMARY, SlideType.SECTION: Theme.SECONDARY}.get(slide_type, "FFFFFF")
+        image = PILImage.new("RGB", self.size, f"#{background}")
+        draw = ImageDraw.Draw(image)
+
+        if slide_type == SlideType.TITLE:
+            self._draw_centered(draw, self.title, (0.5, 2.5, 12.333), 54, Theme.TEXT_LIGHT, bold=True)
+            if self.author:
+                self._draw_centered(draw, self.author, (0.5, 4.5, 12.333), 20, Theme.TEXT_LIGHT)
+        elif slide_type == SlideType.SECTION:
+            self._draw_centered(draw, f"Chapter {chapter.order}", (0.5, 2, 12.333), 24, Theme.ACCENT)
+            self._draw_centered(draw, chapter.title, (0.5, 2.8, 12.333), 48, Theme.TEXT_LIGHT, bold=True)
+        else:
+            self._draw_layout(draw, slide_type == SlideType.CODE, chapter.title)
+            if slide_type == SlideType.AGENDA:
+                self._draw_text(draw, "Agenda", (0.5, 0.3), Theme.TITLE_SIZE, Theme.PRIMARY, bold=True)
+                self._draw_paragraphs(draw, (1, 2, 11.333, 4.5), [(chapter.agenda, ())], 24)
+            else:
+                self._draw_text(draw, slide_data.title, (0.5, 0.3), Theme.TITLE_SIZE, Theme.PRIMARY, bold=True)
+                if slide_type == SlideType.CODE:
+                    self._draw_code(draw, slide_data)
+                elif slide_type == SlideType.IMAGE:
+                    self._draw_image_slide(image, draw, slide_data)
+                else:
+                    self._draw_content(image, draw, slide_data)
+
+        return self._encode(image), self._encode(image.resize(self.tile_size, PILImage.Resampling.BOX))
+
+    def stamp(self, png: bytes, number: int, slide_type: SlideType):
+        image = PILImage.open(io.BytesIO(png))
+        if slide_type not in (SlideType.TITLE, SlideType.SECTION):
+            left, top, width, _ = self.SLIDE_NUMBER_BOX
+            inset_x, inset_y = TextFitter.TEXTBOX_INSETS
+            ImageDraw.Draw(image).text(
+                (self._px(left + width - inset_x), self._px(top + inset_y)), str(number),
+                font=self._font("Calibri", Theme.FOOTER_SIZE), fill=f"#{Theme.TEXT_MUTED}", anchor="ra",
+            )
+        return image
+
+    def contact_sheet(self, tiles: list[bytes], columns: int):
+        tile_width, tile_height = self.tile_size
+        gap = self.SHEET_GAP
+        rows = -(-len(tiles) // columns)
+        sheet = PILImage.new(
+            "RGB",
+            (columns * (tile_width + gap) + gap, rows * (tile_height + gap) + gap),
+            f"#{Theme.BG_LIGHT}",
+        )
+        for i, tile in enumerate(tiles):
+            row, column = divmod(i, columns)
+            sheet.paste(PILImage.open(io.BytesIO(tile)), (gap + column * (tile_width + gap), gap + row * (tile_height + gap)))
+        return sheet
+
+    def _draw_layout(self, draw, code_background: bool, chapter_title: str) -> None:
+        draw.rectangle((0, 0, self.size[0], self._px(0.08)), fill=f"#{Theme.ACCENT}")
+        if code_background:
+            left, top, width, height = PresentationBuilder.CODE_BOX
+            draw.rounded_rectangle(
+                (self._px(left), self._px(top), self._px(left + width), self._px(top + height)),
+                radius=self._px(min(width, height) / 6), fill=f"#{Theme.BG_CODE}",
+            )
+        left, top, _, _ = self.FOOTER_BOX
+        self._draw_text(draw, chapter_title, (left, top), Theme.FOOTER_SIZE, Theme.TEXT_MUTED)
+
+    def _draw_content(self, image, draw, slide_data: Slide) -> None:
+        resolved = self.assets.resolve(slide_data.image_path) if slide_data.image_path else None
+        side_image = bool(resolved and slide_data.content)
+        if slide_data.content:
+            left, top, width, height = PresentationBuilder.CONTENT_BOX
+            if side_image:
+                width = PresentationBuilder.SIDE_TEXT_WIDTH
+            size = self.fitter.fit_bullets(slide_data.content, side_image).size
+            items = list(zip(slide_data.content, slide_data.spans))
+            self._draw_paragraphs(draw, (left, top, width, height), items, size, prefix=PresentationBuilder.BULLET)
+        if resolved:
+            self._paste_image(image, resolved, (7.8, 2, *PresentationBuilder.SIDE_IMAGE_BOX))
+
+    def _draw_image_slide(self, image, draw, slide_data: Slide) -> None:
+        resolved = self.assets.resolve(slide_data.image_path)
+        if resolved:
+            self._paste_image(image, resolved, (2, 2, *PresentationBuilder.IMAGE_BOX))
+        else:
+            self._draw_centered(draw, f"[Image not found: {slide_data.image_path}]", (2, 3, 9.333), 18, Theme.TEXT_MUTED)
+
+    def _draw_code(self, draw, slide_data: Slide) -> None:
+        left, top, _, _ = PresentationBuilder.CODE_BOX
+        padding = PresentationBuilder.CODE_PADDING
+        inset_x, inset_y = TextFitter.TEXTBOX_INSETS
+        x0 = self._px(left + padding + inset_x)
+        y = self._px(top + padding + inset_y)
+
+        label = slide_data.code_language.upper() if slide_data.code_language else "CODE"
+        label_font = self._font("Consolas", TextFitter.CODE_LABEL_SIZE)
+        draw.text((x0, y), f"// {label}", font=label_font, fill=f"#{Theme.TEXT_MUTED}")
+        y += self._pt(TextFitter.CODE_LABEL_SIZE) * TextFitter.LINE_SPACING
+
+        size = self.fitter.fit_code(slide_data.code).size
+        font = self._font("Consolas", size)
+        line_height = self._pt(size) * TextFitter.LINE_SPACING
+        code = slide_data.code
+        spans = highlight_code(code, slide_data.code_language) or (0, len(code), Theme.TEXT_LIGHT)
+        x = x0
+        for i in range(0, len(spans), 3):
+            start, end, color = spans[i:i + 3]
+            for j, line in enumerate(code[start:end].split("\n")):
+                if j:
+                    x = x0
+                    y += line_height
+                if line:
+                    draw.text((x, y), line, font=font, fill=f"#{color}")
+                    x += font.getlength(line)
+
+    def _draw_paragraphs(self, draw, box, items: list[tuple[str, InlineSpans]], size: int, prefix: str = "") -> None:
+        left, top, width, _ = box
+        inset_x, inset_y = TextFitter.TEXTBOX_INSETS
+        x0 = self._px(left + inset_x)
+        max_width = self._px(width - 2 * inset_x)
+        y = self._px(top + inset_y)
+        line_height = self._pt(size) * TextFitter.LINE_SPACING
+        space = self._font("Calibri", size).getlength(" ")
+
+        for text, spans in items:
+            lines: list[list[tuple[float, str, object, str]]] = [[]]
+            x = 0.0
+            for word in self._words(prefix, text, spans, size):
+                word_width = sum(font.getlength(part) for part, font, _ in word)
+                if lines[-1] and x + space + word_width > max_width:
+                    lines.append([])
+                    x = 0.0
+                elif lines[-1]:
+                    x += space
+                for part, font, color in word:
+                    lines[-1].append((x, part, font, color))
+                    x += font.getlength(part)
+
+            for line in lines:
+                for x, part, font, color in line:
+                    draw.text((x0 + x, y), part, font=font, fill=f"#{color}")
+                y += line_height
+            y += self._pt(TextFitter.PARAGRAPH_SPACING)
+
+    def _words(self, prefix: str, text: str, spans: InlineSpans, size: int) -> Iterator[list[tuple[str, object, str]]]:
+        pieces = [(prefix, InlineStyle.PLAIN)] if prefix else []
+        if spans:
+            pieces += [(text[start:end], style) for start, end, style in zip(spans[::3], spans[1::3], spans[2::3])]
+        else:
+            pieces.append((text, InlineStyle.PLAIN))
+
+        word = []
+        for piece, style in pieces:
+            if InlineStyle.CODE in style:
+                font, color = self._font("Consolas", size), Theme.ACCENT
+            else:
+                face = "Calibri" + " Bold" * (InlineStyle.BOLD in style) + " Italic" * (InlineStyle.ITALIC in style)
+                font, color = self._font(face, size), Theme.TEXT_DARK
+            for token in self.WORD_PATTERN.findall(piece):
+                if token.isspace():
+                    if word:
+                        yield word
+                    word = []
+                else:
+                    word.append((token, font, color))
+        if word:
+            yield word
+
+    def _draw_text(self, draw, text: str, origin: tuple[float, float], size: int, color: str, bold: bool = False) -> None:
+        inset_x, inset_y = TextFitter.TEXTBOX_INSETS
+        font = self._font("Calibri Bold" if bold else "Calibri", size)
+        draw.text((self._px(origin[0] + inset_x), self._px(origin[1] + inset_y)), text, font=font, fill=f"#{color}")
+
+    def _draw_centered(self, draw, text: str, box: tuple[float, float, float], size: int, color: str, bold: bool = False) -> None:
+        left, top, width = box
+        font = self._font("Calibri Bold" if bold else "Calibri", size)
+        _, inset_y = TextFitter.TEXTBOX_INSETS
+        draw.text((self._px(left + width / 2), self._px(top + inset_y)), text, font=font, fill=f"#{color}", anchor="ma")
+
+    def _paste_image(self, image, path: Path, box: tuple[float, float, float, float]) -> None:
+        left, top, max_width, max_height = box
+        with PILImage.open(path) as source:
+            width, height = PresentationBuilder._fit_size(*source.size, self._px(max_width), self._px(max_height))
+            source.draft("RGB", (width, height))
+            picture = source.convert("RGBA").resize((max(width, 1), max(height, 1)), PILImage.Resampling.LANCZOS)
+        image.paste(picture, (self._px(left), self._px(top)), picture)
+
+    def _font(self, face: str, size: int):
+        key = (face, size)
+        font = self._fonts.get(key)
+        if font is None:
+            pixels = max(round(self._pt(size)), 1)
+            for name in self.FONT_FILES[face]:
+                try:
+                    font = ImageFont.truetype(name, pixels)
+                    break
+                except OSError:
+                    continue
+            else:
+                font = ImageFont.load_default(pixels)
+            self._fonts[key] = font
+        return font
+
+    @staticmethod
+    def _encode(image) -> bytes:
+        # Cache entries favour encode speed; the PNGs users get are written at Pillow's default level.
+        buffer = io.BytesIO()
+        image.save(buffer, "PNG", compress_level=1)
+        return buffer.getvalue()
+
+    def _px(self, inches: float) -> int:
+        return round(inches * self.ppi)
+
+    def _pt(self, points: float) -> float:
+        return points * self.ppi / 72
+
+
+def _prepare_output(output: Optional[Path], title: str, timestamped: bool = True, suffix: str = ".pptx") -> Path:
+    if output is None:
+        exports_dir = Path("exports")
+        exports_dir.mkdir(parents=True, exist_ok=True)
+        safe_title = re.sub(r'[^\w\s-]', '', title).strip().replace(' ', '_').lower()
+        if timestamped:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            return exports_dir / f"{safe_title}_{timestamp}{suffix}"
+        return exports_dir / f"{safe_title}{suffix}"
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    return output
+
+
+def _build_streaming(
+    input_dir: Path,
+    md_files: list[Path],
+    output: Path,
+    title: str,
+    author: str,
+    max_dpi: Optional[int],
+    jpeg_quality: int,
+    profiler: Optional[Profiler] = None,
+    assets: Optional[AssetIndex] = None,
+    strict: bool = False,
+    packaging: Optional[Packaging] = None,
+    remote: Optional[RemoteImageStore] = None,
+    max_lines: Optional[int] = None,
+) -> None:
+    assets = assets or AssetIndex([input_dir / "images"])
+    if remote is not None:
+        _fetch_streamed_remote_images(assets, md_files, remote)
+    if strict:
+        _check_assets(assets, (MarkdownParser().parse_file(md_file) for md_file in md_files), strict)
+
+    console.print("[bold]Chapters:[/bold]")
+
+    def on_chapter(chapter: Chapter, slide_count: int) -> None:
+        console.print(f"  {chapter.order:02d}. {chapter.title} ({slide_count} slides)")
+
+    parser = MarkdownParser()
+    if profiler is not None:
+        profiler.wrap(parser, "read_chapter", category="parse")
+    optimizer = ImageOptimizer(max_dpi, jpeg_quality) if max_dpi else None
+    builder = PresentationBuilder(
+        title=title, author=author, images_dir=input_dir / "images", assets=assets,
+        optimizer=optimizer, packaging=packaging, profiler=profiler, max_lines=max_lines,
+    )
+    try:
+        builder.build_streaming(parser, md_files, output, on_chapter=on_chapter)
+    finally:
+        builder.images.close()
+
+    if builder.optimized_images:
+        _print_optimized_images(builder.optimized_images)
+
+    console.print(f"\n[green]Saved: {output}[/green]")
+    console.print(f"[dim]   Total slides: {builder.slide_number}[/dim]")
+    console.print(f"[dim]   Images: {builder.image_hits} cache hits, {builder.image_misses} misses[/dim]")
+    _print_package(output, builder)
+    _print_dedup(builder.dedup)
+    _print_overflows(builder.overflows)
+    console.print()
+
+
+def _fetch_streamed_remote_images(assets: AssetIndex, md_files: list[Path], store: RemoteImageStore) -> None:
+    # Slides are read one at a time and only remote URLs are kept, so --stream stays within its memory bound.
+    parser = MarkdownParser()
+    urls = set()
+    for md_file in md_files:
+        with parser.open_chapter(md_file, mapped=True) as (_, slides):
+            urls.update(
+                slide_data.image_path for slide_data in slides
+                if slide_data.image_path and store.is_remote(slide_data.image_path)
+            )
+    _fetch_remote_urls(assets, urls, store)
+
+
+def _fetch_remote_images(assets: AssetIndex, chapters: Iterable[Chapter], store: RemoteImageStore, quiet: bool = False) -> None:
+    urls = {
+        slide_data.image_path
+        for chapter in chapters for slide_data in chapter.slides
+        if slide_data.image_path and store.is_remote(slide_data.image_path)
+    }
+    _fetch_remote_urls(assets, urls, store, quiet)
+
+
+def _fetch_remote_urls(assets: AssetIndex, urls: set[str], store: RemoteImageStore, quiet: bool = False) -> None:
+    if not urls:
+        return
+
+    assets.add_remote(store.fetch(urls))
+    if not quiet:
+        console.print(
+            f"[dim]Remote images: {len(urls)} URLs, {store.fresh} fresh, {store.revalidated} revalidated, "
+            f"{store.downloaded} downloaded ({store.requests} requests over {store.connections} connections)[/dim]"
+        )
+    for url, error in store.failed.items():
+        console.print(f"[yellow]Could not fetch {url}: {error}[/yellow]")
+    if not quiet:
+        console.print()
+
+
+def _parse_formats(value: str) -> list[OutputFormat]:
+    formats = []
+    for name in value.split(","):
+        try:
+            output_format = OutputFormat(name.strip().lower())
+        except ValueError:
+            console.print(f"[red]Unknown format {name.strip()!r}, expected {', '.join(f.value for f in OutputFormat)}[/red]")
+            raise typer.Exit(1)
+        if output_format not in formats:
+            formats.append(output_format)
+    return formats
+
+
+def _format_path(renderer_type: type[Renderer], output: Path) -> Path:
+    # The deck goes exactly where -o says; the other formats sit next to it.
+    return output if issubclass(renderer_type, PresentationBuilder) else output.with_suffix(renderer_type.SUFFIX)
+
+
+def _check_format_paths(formats: list[OutputFormat], output: Path) -> None:
+    renderer_types = {OutputFormat.PPTX: PresentationBuilder, OutputFormat.HTML: HtmlRenderer}
+    paths: dict[Path, OutputFormat] = {}
+    for output_format in formats:
+        path = _format_path(renderer_types[output_format], output).resolve()
+        if path in paths:
+            console.print(
+                f"[red]--format {paths[path].value},{output_format.value} would write both to {path}; "
+                f"give -o a suffix other than {path.suffix or 'none'}[/red]"
+            )
+            raise typer.Exit(1)
+        paths[path] = output_format
+
+
+def _render_formats(renderers: list[Renderer], chapters: list[Chapter], output: Path, executor: Optional[Executor]) -> None:
+    if len(renderers) == 1:
+        renderers[0].build(chapters, _format_path(type(renderers[0]), output), executor)
+        return
+
+    # Every backend renders the same parsed chapters side by side. The pptx builder farms its
+    # chapters out to the process pool with --jobs, so the other backends overlap with it.
+    with ThreadPoolExecutor(max_workers=len(renderers)) as threads:
+        futures = [
+            threads.submit(renderer.build, chapters, _format_path(type(renderer), output), executor)
+            for renderer in renderers
+        ]
+        for future in futures:
+            future.result()
+
+
+def _check_assets(assets: AssetIndex, chapters: Iterable[Chapter], strict: bool = False) -> None:
+    missing, unused = assets.check(chapters)
+    if strict and missing:
+        _print_assets(assets, missing, unused)
+        console.print(f"[red]{len(missing)} referenced images are missing[/red]")
+        raise typer.Exit(1)
+    if missing or unused or assets.duplicates:
+        console.print(
+            f"[yellow]Images: {len(missing)} missing, {len(assets.duplicates)} duplicate names, "
+            f"{len(unused)} unused, see preview[/yellow]\n"
+        )
+
+
+def _print_assets(assets: AssetIndex, missing: list[tuple[Chapter, Slide]], unused: list[Path]) -> None:
+    console.print("[bold]Images:[/bold]")
+    for chapter, slide_data in missing:
+        console.print(
+            f"  [red]missing[/red]   {slide_data.image_path} "
+            f"[dim]({chapter.filename}:{slide_data.source_line} {slide_data.title or '(no title)'})[/dim]"
+        )
+    for name, paths in assets.duplicates.items():
+        console.print(f"  [yellow]duplicate[/yellow] {name} [dim](using {paths[0]}, ignoring {', '.join(map(str, paths[1:]))})[/dim]")
+    for path in unused:
+        console.print(f"  [dim]unused    {path}[/dim]")
+
+
+PACKAGE_PARTS = (
+    ("slides", "ppt/slides/slide"),
+    ("slide_rels", "ppt/slides/_rels/"),
+    ("media", "ppt/media/"),
+    ("layouts", "ppt/slideLayouts/"),
+    ("masters", "ppt/slideMasters/"),
+    ("theme", "ppt/theme/"),
+)
+
+
+def _package_parts(output: Path) -> dict[str, dict[str, int]]:
+    parts: dict[str, dict[str, int]] = {}
+    with zipfile.ZipFile(output) as archive:
+        for info in archive.infolist():
+            part = next((part for part, prefix in PACKAGE_PARTS if info.filename.startswith(prefix)), "other")
+            totals = parts.setdefault(part, {"files": 0, "bytes": 0, "uncompressed_bytes": 0})
+            totals["files"] += 1
+            totals["bytes"] += info.compress_size
+            totals["uncompressed_bytes"] += info.file_size
+    return parts
+
+
+def _build_report(
+    input_dir: Path,
+    output: Path,
+    seconds: float,
+    builder: PresentationBuilder,
+    profiler: Optional[Profiler],
+    build_cache: Optional[BuildCache],
+) -> dict:
+    events = profiler.events if profiler is not None else []
+    parse_seconds = {event.args["file"]: event.duration for event in events if event.category == "parse" and "file" in event.args}
+    render_seconds = {event.args["number"]: event.duration for event in events if event.category == "render"}
+    overflowing = {(chapter.filename, slide_data) for chapter, slide_data in builder.overflows}
+
+    slides = []
+    chapters = []
+
+    def add_slide(chapter: Optional[Chapter], title: str, slide_type: str, overflow: bool = False) -> None:
+        number = len(slides) + 1
+        xml_bytes, image_bytes = builder.slide_sizes[number - 1] if number <= len(builder.slide_sizes) else (0, 0)
+        slides.append({
+            "number": number,
+            "chapter": chapter.filename if chapter else None,
+            "title": title,
+            "type": slide_type,
+            "render_seconds": render_seconds.get(number),
+            "xml_bytes": xml_bytes,
+            "image_bytes": image_bytes,
+            "overflow": overflow,
+        })
+
+    add_slide(None, builder.title, "title")
+    for chapter in builder.chapters:
+        first_slide = len(slides) + 1
+        add_slide(chapter, f"Chapter {chapter.order}", "section")
+        if chapter.agenda:
+            add_slide(chapter, "Agenda", "agenda")
+        for slide_data in chapter.slides:
+            add_slide(
+                chapter, slide_data.title, slide_data.slide_type.name.lower(),
+                (chapter.filename, slide_data) in overflowing,
+            )
+
+        chapter_slides = slides[first_slide - 1:]
+        rendered = [slide["render_seconds"] for slide in chapter_slides if slide["render_seconds"] is not None]
+        chapters.append({
+            "file": chapter.filename,
+            "order": chapter.order,
+            "title": chapter.title,
+            "first_slide": first_slide,
+            "slides": len(chapter_slides),
+            "source": builder.chapter_sources.get(chapter.filename),
+            "parse_seconds": parse_seconds.get(chapter.filename),
+            "render_seconds": sum(rendered) if rendered else None,
+            "image_bytes": sum(slide["image_bytes"] for slide in chapter_slides),
+            "overflows": sum(slide["overflow"] for slide in chapter_slides),
+        })
+
+    dedup = builder.dedup
+    return {
+        "version": __version__,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "input": str(input_dir),
+        "output": str(output),
+        "seconds": seconds,
+        "phases": {category: totals["seconds"] for category, totals in profiler.totals(by="category").items()}
+        if profiler is not None else {},
+        "slide_count": len(slides),
+        "output_bytes": output.stat().st_size,
+        "parts": _package_parts(output),
+        "images": {
+            "cache_hits": builder.image_hits,
+            "cache_misses": builder.image_misses,
+            "references": dedup.media_references,
+            "files": dedup.media_files,
+            "referenced_bytes": dedup.media_bytes,
+            "stored_bytes": dedup.stored_media_bytes,
+        },
+        "cache": {"hits": build_cache.hits, "misses": build_cache.misses} if build_cache is not None else None,
+        "reused_slides": dedup.reused_slides,
+        "overflow_slides": len(builder.overflows),
+        "chapters": chapters,
+        "slides": slides,
+    }
+
+
+def _prometheus_report(report: dict) -> str:
+    deck = Path(report["output"]).name
+    lines = []
+
+    def label(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    def metric(name: str, kind: str, help_text: str, samples) -> None:
+        samples = list(samples)
+        if not samples:
+            return
+        lines.append(f"# HELP pptx_{name} {help_text}")
+        lines.append(f"# TYPE pptx_{name} {kind}")
+        for labels, value in samples:
+            labels = {"deck": deck, **labels}
+            rendered = ",".join(f'{key}="{label(val)}"' for key, val in labels.items())
+            lines.append(f"pptx_{name}{{{rendered}}} {value}")
+
+    images = report["images"]
+    metric("build_duration_seconds", "gauge", "Wall-clock time of the build.", [({}, report["seconds"])])
+    metric("phase_duration_seconds", "gauge", "Time spent per build phase.",
+           [({"phase": phase}, seconds) for phase, seconds in report["phases"].items()])
+    metric("slides", "gauge", "Slides in the deck.", [({}, report["slide_count"])])
+    metric("output_bytes", "gauge", "Size of the .pptx file.", [({}, report["output_bytes"])])
+    metric("part_bytes", "gauge", "Compressed bytes per package part type.",
+           [({"part": part}, totals["bytes"]) for part, totals in report["parts"].items()])
+    metric("part_uncompressed_bytes", "gauge", "Uncompressed bytes per package part type.",
+           [({"part": part}, totals["uncompressed_bytes"]) for part, totals in report["parts"].items()])
+    metric("image_referenced_bytes", "gauge", "Image bytes referenced by slides before deduplication.",
+           [({}, images["referenced_bytes"])])
+    metric("image_stored_bytes", "gauge", "Image bytes stored in the package.", [({}, images["stored_bytes"])])
+    metric("image_cache_hits", "gauge", "Image asset cache hits.", [({}, images["cache_hits"])])
+    metric("image_cache_misses", "gauge", "Image asset cache misses.", [({}, images["cache_misses"])])
+    if report["cache"] is not None:
+        metric("build_cache_hits", "gauge", "Build cache hits.", [({}, report["cache"]["hits"])])
+        metric("build_cache_misses", "gauge", "Build cache misses.", [({}, report["cache"]["misses"])])
+    metric("reused_slides", "gauge", "Repeated slides reused instead of re-rendered.", [({}, report["reused_slides"])])
+    metric("overflow_slides", "gauge", "Slides that overflow at the minimum font size.", [({}, report["overflow_slides"])])
+    metric("chapter_slides", "gauge", "Slides per chapter.",
+           [({"chapter": chapter["file"]}, chapter["slides"]) for chapter in report["chapters"]])
+    metric("chapter_parse_seconds", "gauge", "Parse time per chapter.",
+           [({"chapter": chapter["file"]}, chapter["parse_seconds"])
+            for chapter in report["chapters"] if chapter["parse_seconds"] is not None])
+    metric("chapter_render_seconds", "gauge", "Render time per chapter.",
+           [({"chapter": chapter["file"]}, chapter["render_seconds"])
+            for chapter in report["chapters"] if chapter["render_seconds"] is not None])
+    metric("chapter_image_bytes", "gauge", "Image bytes referenced per chapter.",
+           [({"chapter": chapter["file"]}, chapter["image_bytes"]) for chapter in report["chapters"]])
+    return "\n".join(lines) + "\n"
+
+
+def _write_report(report: dict, report_format: ReportFormat, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if report_format == ReportFormat.JSON:
+        path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    else:
+        path.write_text(_prometheus_report(report), encoding="utf-8")
+    console.print(f"[dim]   Report: {path}[/dim]")
+
+
+def _print_package(output: Path, builder: PresentationBuilder) -> None:
+    packaging = builder.packaging
+    console.print(
+        f"[dim]   Package: {output.stat().st_size / 1024:,.1f} KB, compressed in {builder.save_seconds:.2f}s "
+        f"(xml level {packaging.xml_level}, media level {packaging.media_level})[/dim]"
+    )
+
+
+def _print_dedup(dedup: DedupStats) -> None:
+    if dedup.reused_slides:
+        console.print(f"[dim]   Dedup: {dedup.reused_slides} repeated slides reused instead of re-rendered[/dim]")
+    if dedup.media_references > dedup.media_files:
+        console.print(
+            f"[dim]   Dedup: {dedup.media_references} image references stored as {dedup.media_files} files, "
+            f"{dedup.media_bytes / 1024:,.1f} KB -> {dedup.stored_media_bytes / 1024:,.1f} KB "
+            f"({dedup.media_ratio:.1f}x)[/dim]"
+        )
+
+
+def _evict_cache(cache: BuildCache) -> None:
+    removed, freed = cache.evict()
+    if removed:
+        console.print(f"[dim]   Cache: evicted {removed} old entries ({freed / 1024 / 1024:,.1f} MB)[/dim]")
+
+
+def _print_overflows(overflows: list[tuple[Chapter, Slide]]) -> None:
+    if overflows:
+        console.print(
+            f"[yellow]   Overflow: {len(overflows)} slides don't fit even at the minimum font size, "
+            f"see preview[/yellow]"
+        )
+
+
+def _print_profile(profiler: Optional[Profiler], trace: Optional[Path], limit: int = 10) -> None:
+    if profiler is None:
+        return
+
+    total = sum(event.duration for event in profiler.events if event.category != "image")
+    phases = Table(title="Phases")
+    phases.add_column("Phase")
+    phases.add_column("Calls", justify="right")
+    phases.add_column("Time (s)", justify="right")
+    phases.add_column("Share", justify="right")
+    phases.add_column("Peak +KB", justify="right")
+    phases.add_column("Blocks", justify="right")
+    totals = profiler.totals(by="category")
+    for category in ("parse", "optimize", "render", "image", "save"):
+        if category not in totals:
+            continue
+        stats = totals[category]
+        share = f"{stats['seconds'] / total:.0%}" if total and category != "image" else "-"
+        phases.add_row(
+            category, str(stats["calls"]), f"{stats['seconds']:.3f}", share, f"{stats['peak_growth'] / 1024:.0f}",
+            f"{stats['block_growth']:+,}",
+        )
+    console.print(phases)
+    console.print(
+        "[dim]   image time is also counted in render; Peak +KB is how much the span raised peak memory, "
+        "Blocks how many more Python allocator blocks were live when it ended[/dim]\n"
+    )
+
+    slides = [event for event in profiler.events if event.category == "render"]
+    slowest = Table(title=f"Slowest {min(limit, len(slides))} slides")
+    slowest.add_column("#", justify="right")
+    slowest.add_column("Chapter")
+    slowest.add_column("Slide")
+    slowest.add_column("Type")
+    slowest.add_column("Time (ms)", justify="right")
+    slowest.add_column("Peak +KB", justify="right")
+    slowest.add_column("Blocks", justify="right")
+    for event in sorted(slides, key=lambda event: event.duration, reverse=True)[:limit]:
+        slowest.add_row(
+            str(event.args["number"]), event.args["chapter"], event.name, event.args["type"],
+            f"{event.duration * 1000:.2f}", f"{event.peak_growth / 1024:.0f}", f"{event.block_growth:+,}",
+        )
+    console.print(slowest)
+
+    chapters: dict[str, list[ProfileEvent]] = {}
+    for event in slides:
+        if event.args["chapter"]:
+            chapters.setdefault(event.args["chapter"], []).append(event)
+    chapter_table = Table(title=f"Slowest {min(limit, len(chapters))} chapters")
+    chapter_table.add_column("Chapter")
+    chapter_table.add_column("Slides", justify="right")
+    chapter_table.add_column("Time (ms)", justify="right")
+    chapter_table.add_column("Peak +KB", justify="right")
+    chapter_table.add_column("Blocks", justify="right")
+    ranked = sorted(chapters.items(), key=lambda item: sum(event.duration for event in item[1]), reverse=True)
+    for chapter_title, events in ranked[:limit]:
+        chapter_table.add_row(
+            chapter_title, str(len(events)),
+            f"{sum(event.duration for event in events) * 1000:.1f}",
+            f"{sum(event.peak_growth for event in events) / 1024:.0f}",
+            f"{sum(event.block_growth for event in events):+,}",
+        )
+    console.print(chapter_table)
+
+    if trace is not None:
+        trace.parent.mkdir(parents=True, exist_ok=True)
+        profiler.write_trace(trace)
+        console.print(f"\n[green]Trace: {trace}[/green] [dim](open in chrome://tracing or ui.perfetto.dev)[/dim]")
+    console.print()
+
+
+def _print_optimized_images(optimized_images: list[OptimizedImage]) -> None:
+    table = Table(title="Image optimization", title_justify="left")
+    table.add_column("Image")
+    table.add_column("Size", justify="right")
+    table.add_column("Format")
+    table.add_column("Before", justify="right")
+    table.add_column("After", justify="right")
+    table.add_column("Saved", justify="right")
+
+    for image in sorted(optimized_images, key=lambda i: i.saved_bytes, reverse=True):
+        table.add_row(
+            image.source.name,
+            f"{image.size[0]}x{image.size[1]}",
+            image.format,
+            f"{image.original_bytes / 1024:,.1f} KB",
+            f"{image.optimized_bytes / 1024:,.1f} KB",
+            f"{image.saved_bytes / 1024:,.1f} KB",
+        )
+
+    saved = sum(image.saved_bytes for image in optimized_images)
+    console.print()
+    console.print(table)
+    console.print(f"[dim]   Saved {saved / 1024:,.1f} KB across {len(optimized_images)} images[/dim]")
+
+
+def _parse_files(
+    parser: MarkdownParser,
+    md_files: list[Path],
+    executor: Optional[Executor] = None,
+    cache: Optional[BuildCache] = None,
+):
+    if cache is None:
+        return executor.map(parser.parse_file, md_files) if executor else map(parser.parse_file, md_files)
+
+    keys = [BuildCache.key("parse:inline", md_file.name, md_file.read_bytes()) for md_file in md_files]
+    results = []
+    for md_file, key in zip(md_files, keys):
+        chapter = cache.get(key)
+        if chapter is None:
+            chapter = executor.submit(parser.parse_file, md_file) if executor else parser.parse_file(md_file)
+        results.append(chapter)
+
+    def resolve():
+        for key, chapter in zip(keys, results):
+            if isinstance(chapter, Future):
+                chapter = chapter.result()
+                cache.put(key, chapter)
+            elif key not in cache.entries:
+                cache.put(key, chapter)
+            yield chapter
+
+    return resolve()
+
+
+_worker_images: Optional[ImageAssetCache] = None
+
+
+def _render_chapter(
+    job: tuple[str, str, AssetIndex, Path, dict[Path, Path], Chapter, int, set[Slide]],
+) -> tuple[list[RenderedSlide], int, int, int]:
+    global _worker_images
+    title, author, assets, work_dir, optimized, chapter, first_number, repeated = job
+    if _worker_images is None or _worker_images.work_dir != work_dir:
+        _worker_images = ImageAssetCache(work_dir)
+    for source, path in optimized.items():
+        if _worker_images.optimized.get(source) != path:
+            _worker_images.set_optimized(source, path)
+
+    hits, misses = _worker_images.hits, _worker_images.misses
+    builder = PresentationBuilder(title=title, author=author, assets=assets, images=_worker_images)
+    builder.repeated_slides = repeated
+    rendered = builder.render_chapter(chapter, first_number)
+    return rendered, _worker_images.hits - hits, _worker_images.misses - misses, builder.dedup.reused_slides
+
+
+def _warm_worker(work_dir: Path) -> None:
+    global _worker_images
+    _worker_images = ImageAssetCache(work_dir)
+    PresentationBuilder()
+
+
+def _build_deck(job: DeckJob, cache_dir: Optional[Path] = None, remote_dir: Optional[Path] = None) -> DeckResult:
+    start = time.perf_counter()
+    hits, misses = _worker_images.hits, _worker_images.misses
+    try:
+        md_files = sorted(job.input_dir.glob("*.md"))
+        if not md_files:
+            raise ValueError(f"No .md files found in {job.input_dir}")
+
+        build_cache = BuildCache(cache_dir) if cache_dir is not None else None
+        chapters = sorted(_parse_files(MarkdownParser(), md_files, cache=build_cache), key=lambda c: c.order)
+        assets = AssetIndex([job.input_dir / "images"])
+        if remote_dir is not None:
+            _fetch_remote_images(assets, chapters, RemoteImageStore(remote_dir), quiet=True)
+        builder = PresentationBuilder(
+            title=job.title, author=job.author, images_dir=job.input_dir / "images",
+            cache=build_cache, images=_worker_images, assets=assets,
         )
+        builder.build(chapters, job.output)
+    except Exception as e:
+        return DeckResult(job.output, seconds=time.perf_counter() - start, error=f"{type(e).__name__}: {e}")
+
+    return DeckResult(
+        job.output, builder.slide_number, time.perf_counter() - start,
+        _worker_images.hits - hits, _worker_images.misses - misses,
+    )
+
+
+def _render_thumbnails(job: tuple[str, str, int, AssetIndex, Chapter, list[int]]) -> list[tuple[bytes, bytes]]:
+    title, author, width, assets, chapter, indices = job
+    rasterizer = SlideRasterizer(title, author, width, assets)
+    pages = rasterizer.pages(chapter)
+    return [rasterizer.render(chapter, *pages[i]) for i in indices]
+
+
+def _load_manifest(manifest: Path) -> list[DeckJob]:
+    entries = json.loads(manifest.read_text(encoding="utf-8"))
+    if not isinstance(entries, list):
+        raise ValueError("the manifest must be a JSON list of jobs")
+
+    jobs = []
+    for i, entry in enumerate(entries, start=1):
+        if "input" not in entry:
+            raise ValueError(f"job {i} has no \"input\"")
+        input_dir = manifest.parent / entry["input"]
+        if not input_dir.is_dir():
+            raise ValueError(f"job {i}: {input_dir} is not a folder")
+
+        title = entry.get("title") or input_dir.name
+        output = manifest.parent / entry["output"] if entry.get("output") else None
+        jobs.append(DeckJob(input_dir, _prepare_output(output, title, timestamped=False), title, entry.get("author", "")))
+
+    outputs = [job.output.resolve() for job in jobs]
+    duplicates = sorted({str(output) for output in outputs if outputs.count(output) > 1})
+    if duplicates:
+        raise ValueError(f"several jobs write to {', '.join(duplicates)}")
+    return jobs
+
 
-    def _extract_title(self, section: str) -> str:
-        match = self.HEADING_PATTERN.search(section)
-        return match.group(2).strip() if match else ""
+@app.command()
+def build(
+    input_dir: Path = typer.Argument(
+        Path("markdown"),
+        help="Folder containing markdown files",
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+    ),
+    output: Optional[Path] = typer.Option(
+        None,
+        "--output", "-o",
+        help="Output file path (defaults to exports/<title>_<timestamp>.pptx)"
+    ),
+    title: str = typer.Option(
+        "Presentation",
+        "--title", "-t",
+        help="Presentation title"
+    ),
+    author: str = typer.Option(
+        "",
+        "--author", "-a",
+        help="Presentation author"
+    ),
+    jobs: int = typer.Option(
+        1,
+        "--jobs", "-j",
+        min=0,
+        help="Number of worker processes for parsing and rendering (0 = all cores)"
+    ),
+    cache: bool = typer.Option(
+        False,
+        "--cache/--no-cache",
+        help="Reuse parsed chapters and rendered slides from previous builds"
+    ),
+    cache_dir: Path = typer.Option(
+        Path(".pptx-cache"),
+        "--cache-dir",
+        help="Folder for the build cache"
+    ),
+    stream: bool = typer.Option(
+        False,
+        "--stream",
+        help="Parse and write slides one at a time to keep memory flat on very large decks"
+    ),
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="Time every phase and slide and print the slowest slides and chapters"
+    ),
+    trace: Optional[Path] = typer.Option(
+        None,
+        "--trace",
+        help="Write a Chrome trace of the profiled build to this file (implies --profile)"
+    ),
+    max_dpi: Optional[int] = typer.Option(
+        None,
+        "--max-dpi",
+        min=1,
+        help="Downscale and recompress images to this resolution at their placed size"
+    ),
+    jpeg_quality: int = typer.Option(
+        85,
+        "--jpeg-quality",
+        min=1,
+        max=95,
+        help="JPEG quality used by --max-dpi for photographic images"
+    ),
+    image_roots: list[Path] = typer.Option(
+        [],
+        "--image-root",
+        help="Extra folder to look up images in after <input>/images (repeatable)"
+    ),
+    strict: bool = typer.Option(
+        False,
+        "--strict",
+        help="Fail before rendering if any referenced image is missing"
+    ),
+    max_lines: Optional[int] = typer.Option(
+        None,
+        "--max-lines",
+        min=1,
+        help="Most code lines or wrapped bullet lines per slide before continuing on a \"(cont.)\" slide"
+    ),
+    remote_ttl: float = typer.Option(
+        86400,
+        "--remote-ttl",
+        min=0,
+        help="Seconds a downloaded http(s) image is used without asking the server again"
+    ),
+    offline: bool = typer.Option(
+        False,
+        "--offline",
+        help="Never fetch http(s) images; use whatever is already in the image store"
+    ),
+    package: PackageMode = typer.Option(
+        PackageMode.DEFAULT,
+        "--package",
+        help="Zip packaging preset: draft (fast save), default, or max (smallest file)"
+    ),
+    xml_level: Optional[int] = typer.Option(
+        None,
+        "--xml-level",
+        min=0,
+        max=9,
+        help="Deflate level for XML and uncompressed media parts, overriding --package (0 = store)"
+    ),
+    media_level: Optional[int] = typer.Option(
+        None,
+        "--media-level",
+        min=0,
+        max=9,
+        help="Deflate level for PNG, JPEG and GIF media, overriding --package (0 = store)"
+    ),
+    report: Optional[ReportFormat] = typer.Option(
+        None,
+        "--report",
+        help="Write a machine-readable build report (per-chapter and per-slide timings and sizes)"
+    ),
+    report_file: Optional[Path] = typer.Option(
+        None,
+        "--report-file",
+        help="Where to write the report (defaults to next to the output file)"
+    ),
+    output_format: str = typer.Option(
+        "pptx",
+        "--format",
+        help="Comma-separated output formats, e.g. pptx,html; all are rendered from one parse"
+    ),
+):
+    """Compiles Markdown files into a PowerPoint presentation and, optionally, HTML slides."""
+    console.print(f"\n[bold blue]PPTX Presentation Generator[/bold blue]\n")
+
+    md_files = sorted(input_dir.glob("*.md"))
+
+    if not md_files:
+        console.print(f"[red]No .md files found in {input_dir}[/red]")
+        raise typer.Exit(1)
+
+    formats = _parse_formats(output_format)
+    output = _prepare_output(output, title)
+    _check_format_paths(formats, output)
+
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
 
-    def _extract_list_items(self, section: str) -> list[str]:
-        items = self.LIST_ITEM_PATTERN.findall(section)
-        return [item.strip() for item in items]
+    if stream and (jobs > 1 or cache):
+        console.print("[red]--stream cannot be combined with --jobs or --cache[/red]")
+        raise typer.Exit(1)
+
+    if stream and report:
+        console.print("[red]--report needs the whole deck in memory and cannot be combined with --stream[/red]")
+        raise typer.Exit(1)
 
+    if stream and formats != [OutputFormat.PPTX]:
+        console.print("[red]--stream only writes pptx[/red]")
+        raise typer.Exit(1)
 
-class PresentationBuilder:
-    INLINE_PATTERN = re.compile(
-        r'(`[^`]+`)'
-        r'|(\*\*[^*]+\*\*)'
-        r'|(\*[^*]+\*)'
-    )
+    if report and OutputFormat.PPTX not in formats:
+        console.print("[red]--report describes the pptx build and needs pptx in --format[/red]")
+        raise typer.Exit(1)
 
-    def __init__(self, title: str = "Presentation", author: str = "", images_dir: Optional[Path] = None):
-        self.prs = Presentation()
-        self.prs.slide_width = Inches(13.333)
-        self.prs.slide_height = Inches(7.5)
-        self.title = title
-        self.author = author
-        self.images_dir = images_dir or Path("images")
-        self.slide_number = 0
-        self.total_slides = 0
+    show_profile = profile or trace is not None
+    if show_profile and jobs > 1:
+        console.print("[red]--profile only sees the main process and cannot be combined with --jobs[/red]")
+        raise typer.Exit(1)
+    profiler = Profiler() if show_profile or (report and jobs == 1) else None
+    started = time.perf_counter()
 
-    def build(self, chapters: list[Chapter], output_path: Path) -> None:
-        self.total_slides = 1
-        for chapter in chapters:
-            self.total_slides += 1
-            if chapter.agenda:
-                self.total_slides += 1
-            self.total_slides += len(chapter.slides)
+    console.print(f"[dim]Found {len(md_files)} markdown files[/dim]\n")
 
-        self._add_title_slide()
+    assets = AssetIndex([input_dir / "images", *image_roots])
+    packaging = Packaging.preset(package, xml_level, media_level)
+    remote = RemoteImageStore(cache_dir / "remote", ttl=remote_ttl, offline=offline)
 
-        for chapter in chapters:
-            self._add_chapter(chapter)
+    if stream:
+        _build_streaming(
+            input_dir, md_files, output, title, author, max_dpi, jpeg_quality, profiler, assets, strict, packaging,
+            remote, max_lines,
+        )
+        _print_profile(profiler, trace)
+        return
 
-        self.prs.save(output_path)
+    build_cache = BuildCache(cache_dir) if cache else None
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        parser = MarkdownParser()
+        if profiler is not None:
+            profiler.wrap(parser, "parse_file", category="parse", describe=lambda md_file: {"file": md_file.name})
+        chapters: list[Chapter] = []
 
-    def _add_title_slide(self) -> None:
-        self.slide_number += 1
-        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
-        self._set_slide_background(slide, Theme.PRIMARY)
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            console=console,
+        ) as progress:
+            task = progress.add_task("Parsing files...", total=len(md_files))
 
-        title_box = slide.shapes.add_textbox(
-            Inches(0.5), Inches(2.5), Inches(12.333), Inches(1.5)
-        )
-        tf = title_box.text_frame
-        p = tf.paragraphs[0]
-        p.text = self.title
-        p.font.size = Pt(54)
-        p.font.bold = True
-        p.font.color.rgb = Theme.TEXT_LIGHT
-        p.alignment = PP_ALIGN.CENTER
+            parsed = _parse_files(parser, md_files, executor, build_cache)
+            for md_file, chapter in zip(md_files, parsed):
+                chapters.append(chapter)
+                progress.update(task, advance=1, description=f"Parsing: {md_file.name}")
 
-        if self.author:
-            author_box = slide.shapes.add_textbox(
-                Inches(0.5), Inches(4.5), Inches(12.333), Inches(0.5)
-            )
-            tf = author_box.text_frame
-            p = tf.paragraphs[0]
-            p.text = self.author
-            p.font.size = Pt(20)
-            p.font.color.rgb = Theme.TEXT_LIGHT
-            p.alignment = PP_ALIGN.CENTER
+        chapters.sort(key=lambda c: c.order)
 
-    def _add_chapter(self, chapter: Chapter) -> None:
-        self._add_section_slide(chapter)
+        console.print("\n[bold]Chapters:[/bold]")
+        for ch in chapters:
+            console.print(f"  {ch.order:02d}. {ch.title} ({len(ch.slides)} slides)")
+        console.print()
+        _fetch_remote_images(assets, chapters, remote)
+        _check_assets(assets, chapters, strict)
 
-        if chapter.agenda:
-            self._add_agenda_slide(chapter)
+        console.print(f"[dim]Generating presentation...[/dim]")
 
-        for slide_data in chapter.slides:
-            self._add_slide(slide_data, chapter.title)
+        renderers: list[Renderer] = []
+        builder = None
+        if OutputFormat.PPTX in formats:
+            optimizer = ImageOptimizer(max_dpi, jpeg_quality) if max_dpi else None
+            builder = PresentationBuilder(
+                title=title, author=author, images_dir=input_dir / "images",
+                cache=build_cache, assets=assets, optimizer=optimizer, packaging=packaging, profiler=profiler,
+                max_lines=max_lines,
+            )
+            renderers.append(builder)
+        if OutputFormat.HTML in formats:
+            renderers.append(HtmlRenderer(title=title, author=author, assets=assets, max_lines=max_lines))
+        try:
+            _render_formats(renderers, chapters, output, executor)
+        finally:
+            if builder is not None:
+                builder.images.close()
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
-    def _add_section_slide(self, chapter: Chapter) -> None:
-        self.slide_number += 1
-        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
-        self._set_slide_background(slide, Theme.SECONDARY)
+    for renderer in renderers:
+        if isinstance(renderer, HtmlRenderer):
+            html_output = _format_path(type(renderer), output)
+            console.print(f"\n[green]Saved: {html_output}[/green]")
+            console.print(
+                f"[dim]   Total slides: {renderer.slide_number}, "
+                f"{len(renderer.media)} images in {html_output.stem}_files/[/dim]"
+            )
+    if builder is None:
+        if build_cache is not None:
+            _evict_cache(build_cache)
+        console.print()
+        return
 
-        num_box = slide.shapes.add_textbox(
-            Inches(0.5), Inches(2), Inches(12.333), Inches(0.8)
-        )
-        tf = num_box.text_frame
-        p = tf.paragraphs[0]
-        p.text = f"Chapter {chapter.order}"
-        p.font.size = Pt(24)
-        p.font.color.rgb = Theme.ACCENT
-        p.alignment = PP_ALIGN.CENTER
+    if builder.optimized_images:
+        _print_optimized_images(builder.optimized_images)
 
-        title_box = slide.shapes.add_textbox(
-            Inches(0.5), Inches(2.8), Inches(12.333), Inches(1.5)
+    console.print(f"\n[green]Saved: {output}[/green]")
+    console.print(f"[dim]   Total slides: {builder.slide_number}[/dim]")
+    console.print(f"[dim]   Images: {builder.image_hits} cache hits, {builder.image_misses} misses[/dim]")
+    _print_package(output, builder)
+    _print_dedup(builder.dedup)
+    _print_overflows(builder.overflows)
+    if build_cache is not None:
+        console.print(
+            f"[dim]   Cache: {build_cache.hits} hits, {build_cache.misses} misses, "
+            f"{builder.rendered_chapters}/{len(chapters)} chapters rendered[/dim]"
         )
-        tf = title_box.text_frame
-        p = tf.paragraphs[0]
-        p.text = chapter.title
-        p.font.size = Pt(48)
-        p.font.bold = True
-        p.font.color.rgb = Theme.TEXT_LIGHT
-        p.alignment = PP_ALIGN.CENTER
+        _evict_cache(build_cache)
+    if report:
+        report_data = _build_report(input_dir, output, time.perf_counter() - started, builder, profiler, build_cache)
+        suffix = ".report.json" if report == ReportFormat.JSON else ".prom"
+        _write_report(report_data, report, report_file or output.with_name(output.stem + suffix))
+    console.print()
+    _print_profile(profiler if show_profile else None, trace)
 
-    def _add_agenda_slide(self, chapter: Chapter) -> None:
-        self.slide_number += 1
-        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
-        self._add_slide_header(slide, "Agenda")
 
-        content_box = slide.shapes.add_textbox(
-            Inches(1), Inches(2), Inches(11.333), Inches(4.5)
-        )
-        tf = content_box.text_frame
-        tf.word_wrap = True
+BENCH_WORDS = (
+    "render", "slide", "deck", "chapter", "parser", "layout", "theme", "cache", "image", "bullet",
+    "footer", "title", "section", "agenda", "builder", "master", "export", "markdown", "inline", "run",
+)
 
-        p = tf.paragraphs[0]
-        p.text = chapter.agenda
-        p.font.size = Pt(24)
-        p.font.color.rgb = Theme.TEXT_DARK
-        p.alignment = PP_ALIGN.LEFT
 
-        self._add_slide_footer(slide, chapter.title)
+def _generate_corpus(
+    corpus_dir: Path,
+    chapters: int,
+    slides: int,
+    code_ratio: float,
+    image_ratio: float,
+    inline_density: float,
+    seed: int,
+) -> None:
+    rng = random.Random(seed)
+    images_dir = corpus_dir / "images"
+    images_dir.mkdir(parents=True, exist_ok=True)
+    image_names = []
+    for i, size in enumerate([(1600, 900), (1200, 1200), (800, 1000), (2400, 1350)]):
+        name = f"bench_{i}.png"
+        PILImage.radial_gradient("L").resize(size).convert("RGB").save(images_dir / name)
+        image_names.append(name)
 
-    def _add_slide(self, slide_data: Slide, chapter_title: str) -> None:
-        self.slide_number += 1
+    def sentence(words: int) -> str:
+        parts = []
+        for _ in range(words):
+            word = rng.choice(BENCH_WORDS)
+            if rng.random() < inline_density:
+                word = rng.choice(("`{}`", "**{}**", "*{}*")).format(word)
+            parts.append(word)
+        return " ".join(parts)
 
-        if slide_data.slide_type == SlideType.CODE:
-            self._add_code_slide(slide_data, chapter_title)
-        elif slide_data.slide_type == SlideType.IMAGE:
-            self._add_image_slide(slide_data, chapter_title)
-        else:
-            self._add_content_slide(slide_data, chapter_title)
+    for chapter in range(1, chapters + 1):
+        sections = []
+        for number in range(1, slides + 1):
+            lines = [f"# Slide {chapter}.{number}: {sentence(3)}"]
+            roll = rng.random()
+            if roll < code_ratio:
+                lines.append("```python")
+                for i in range(rng.randint(6, 16)):
+                    lines.append(f"    {rng.choice(BENCH_WORDS)}_{i} = {rng.choice(BENCH_WORDS)}({i})")
+                lines.append("```")
+            elif roll < code_ratio + image_ratio:
+                if rng.random() < 0.5:
+                    lines.extend(f"- {sentence(rng.randint(4, 10))}" for _ in range(rng.randint(2, 4)))
+                    lines.append("")
+                lines.append(f"![]({rng.choice(image_names)})")
+            else:
+                lines.extend(f"- {sentence(rng.randint(6, 14))}" for _ in range(rng.randint(3, 6)))
+            sections.append("\n".join(lines))
 
-    def _add_content_slide(self, slide_data: Slide, chapter_title: str) -> None:
-        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
-        self._add_slide_header(slide, slide_data.title)
+        frontmatter = f"---\ntitle: Chapter {chapter}\nagenda: {sentence(12)}\n---\n\n"
+        (corpus_dir / f"{chapter:02d}_chapter.md").write_text(frontmatter + "\n\n---\n\n".join(sections) + "\n", encoding="utf-8")
 
-        resolved_image = None
-        if slide_data.image_path:
-            resolved_image = self._resolve_image_path(slide_data.image_path)
 
-        if resolved_image and slide_data.content:
-            text_width = Inches(6.5)
-        else:
-            text_width = Inches(11.333)
+def _model_bytes_per_slide(md_files: list[Path]) -> float:
+    parser = MarkdownParser()
+    tracemalloc.start()
+    try:
+        chapters = [parser.parse_file(md_file) for md_file in md_files]
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return current / max(1, sum(len(chapter.slides) for chapter in chapters))
 
-        if slide_data.content:
-            content_box = slide.shapes.add_textbox(
-                Inches(1), Inches(1.8), text_width, Inches(5)
-            )
-            tf = content_box.text_frame
-            tf.word_wrap = True
 
-            for i, item in enumerate(slide_data.content):
-                if i == 0:
-                    p = tf.paragraphs[0]
-                else:
-                    p = tf.add_paragraph()
+def _run_bench(corpus_dir: Path, deck_path: Path) -> dict:
+    timer = Profiler()
+    parser = MarkdownParser()
+    timer.wrap(parser, "parse_file")
 
-                self._add_formatted_runs(p, f"\u2022 {item}", Theme.BODY_SIZE, Theme.TEXT_DARK)
-                p.space_after = Pt(12)
-                p.level = 0
+    md_files = parser.sort_files(corpus_dir.glob("*.md"))
+    start = time.perf_counter()
+    chapters = [parser.parse_file(md_file) for md_file in md_files]
 
-        if resolved_image:
-            self._place_image(
-                slide, resolved_image,
-                Inches(7.8), Inches(2),
-                Inches(5), Inches(4.5)
-            )
+    builder = PresentationBuilder(title="Benchmark", author="pptx-gen bench", images_dir=corpus_dir / "images")
+    for name in (
+        "_add_title_slide", "_add_section_slide", "_add_agenda_slide",
+        "_add_content_slide", "_add_code_slide", "_add_image_slide",
+    ):
+        timer.wrap(builder, name)
+    # The writer only exists inside build(), so its class is wrapped for the run and restored after.
+    writer_methods = {name: DeckWriter.__dict__[name] for name in ("add", "close")}
+    for name in writer_methods:
+        timer.wrap(DeckWriter, name, f"DeckWriter.{name}")
+    try:
+        builder.build(chapters, deck_path)
+    finally:
+        for name, method in writer_methods.items():
+            setattr(DeckWriter, name, method)
+        builder.images.close()
+    elapsed = time.perf_counter() - start
 
-        self._add_slide_footer(slide, chapter_title)
+    return {
+        "slides": builder.slide_number,
+        "seconds": elapsed,
+        "slides_per_second": builder.slide_number / elapsed,
+        "peak_memory_bytes": _peak_memory_bytes(),
+        "model_bytes_per_slide": _model_bytes_per_slide(md_files),
+        "output_bytes": deck_path.stat().st_size,
+        "stages": timer.totals(),
+        "packaging": _measure_packaging(deck_path),
+    }
 
-    def _add_formatted_runs(self, paragraph, text: str, size, color) -> None:
-        pos = 0
-        for match in self.INLINE_PATTERN.finditer(text):
-            if match.start() > pos:
-                run = paragraph.add_run()
-                run.text = text[pos:match.start()]
-                run.font.size = size
-                run.font.color.rgb = color
-
-            raw = match.group(0)
-
-            if raw.startswith('`'):
-                run = paragraph.add_run()
-                run.text = raw.strip('`')
-                run.font.size = size
-                run.font.name = "Consolas"
-                run.font.color.rgb = Theme.ACCENT
-            elif raw.startswith('**'):
-                run = paragraph.add_run()
-                run.text = raw.strip('*')
-                run.font.size = size
-                run.font.color.rgb = color
-                run.font.bold = True
-            elif raw.startswith('*'):
-                run = paragraph.add_run()
-                run.text = raw.strip('*')
-                run.font.size = size
-                run.font.color.rgb = color
-                run.font.italic = True
-
-            pos = match.end()
-
-        if pos < len(text):
-            run = paragraph.add_run()
-            run.text = text[pos:]
-            run.font.size = size
-            run.font.color.rgb = color
 
-    def _add_code_slide(self, slide_data: Slide, chapter_title: str) -> None:
-        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
-        self._add_slide_header(slide, slide_data.title)
+def _measure_packaging(deck_path: Path) -> dict[str, dict[str, float]]:
+    with zipfile.ZipFile(deck_path) as source:
+        parts = [(name, source.read(name)) for name in source.namelist()]
 
-        code_left = Inches(0.75)
-        code_top = Inches(1.8)
-        code_width = Inches(11.833)
-        code_height = Inches(5)
+    results = {}
+    for mode in PackageMode:
+        packaging = Packaging.preset(mode)
+        target = deck_path.with_name(f"{deck_path.stem}_{mode.value}{deck_path.suffix}")
+        start = time.perf_counter()
+        with zipfile.ZipFile(target, "w") as archive:
+            for name, data in parts:
+                packaging.write(archive, name, data)
+        results[mode.value] = {"seconds": time.perf_counter() - start, "bytes": target.stat().st_size}
+        target.unlink()
+    return results
 
-        code_bg = slide.shapes.add_shape(
-            MSO_SHAPE.ROUNDED_RECTANGLE,
-            code_left, code_top, code_width, code_height
-        )
-        code_bg.fill.solid()
-        code_bg.fill.fore_color.rgb = Theme.BG_CODE
-        code_bg.line.fill.background()
 
-        code_box = slide.shapes.add_textbox(
-            code_left + Inches(0.3),
-            code_top + Inches(0.3),
-            code_width - Inches(0.6),
-            code_height - Inches(0.6)
-        )
-        tf = code_box.text_frame
-        tf.word_wrap = False
+def _measure_startup(corpus_dir: Path, repeat: int = 5) -> dict[str, float]:
+    commands = {
+        "help": ["--help"],
+        "preview": ["preview", str(corpus_dir)],
+    }
+    startup = {}
+    for name, args in commands.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, __file__, *args], stdout=subprocess.DEVNULL, check=True)
+            timings.append(time.perf_counter() - start)
+        startup[name] = min(timings) * 1000
+    return startup
 
-        lang_label = slide_data.code_language.upper() if slide_data.code_language else "CODE"
 
-        p = tf.paragraphs[0]
-        p.text = f"// {lang_label}"
-        p.font.size = Pt(12)
-        p.font.color.rgb = Theme.TEXT_MUTED
-        p.font.name = "Consolas"
+def _snapshot(input_dir: Path) -> dict[Path, tuple[int, int]]:
+    snapshot = {}
+    for folder, pattern in ((input_dir, "*.md"), (input_dir / "images", "*")):
+        for path in folder.glob(pattern):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
 
-        p = tf.add_paragraph()
-        p.text = slide_data.code
-        p.font.size = Theme.CODE_SIZE
-        p.font.color.rgb = Theme.TEXT_LIGHT
-        p.font.name = "Consolas"
 
-        self._add_slide_footer(slide, chapter_title)
+@app.command()
+def watch(
+    input_dir: Path = typer.Argument(
+        Path("markdown"),
+        help="Folder containing markdown files",
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+    ),
+    output: Optional[Path] = typer.Option(
+        None,
+        "--output", "-o",
+        help="Output file path (defaults to exports/<title>.pptx)"
+    ),
+    title: str = typer.Option(
+        "Presentation",
+        "--title", "-t",
+        help="Presentation title"
+    ),
+    author: str = typer.Option(
+        "",
+        "--author", "-a",
+        help="Presentation author"
+    ),
+    interval: float = typer.Option(
+        0.2,
+        "--interval",
+        min=0.05,
+        help="Seconds between checks for changed files"
+    ),
+    debounce: float = typer.Option(
+        0.3,
+        "--debounce",
+        min=0.0,
+        help="Seconds without further changes before rebuilding"
+    ),
+    package: PackageMode = typer.Option(
+        PackageMode.DRAFT,
+        "--package",
+        help="Zip packaging preset: draft (fast save), default, or max (smallest file)"
+    ),
+    cache_dir: Path = typer.Option(
+        Path(".pptx-cache"),
+        "--cache-dir",
+        help="Where the build cache and fetched remote images live"
+    ),
+):
+    """Rebuilds the presentation whenever the markdown files or images change."""
+    console.print(f"\n[bold blue]PPTX Presentation Generator[/bold blue] [dim](watching {input_dir})[/dim]\n")
 
-    def _add_image_slide(self, slide_data: Slide, chapter_title: str) -> None:
-        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
-        self._add_slide_header(slide, slide_data.title)
+    output = _prepare_output(output, title, timestamped=False)
+    images_dir = input_dir / "images"
+    parser = MarkdownParser()
+    build_cache = BuildCache(cache_dir)
+    images = ImageAssetCache()
+    remote = RemoteImageStore(cache_dir / "remote")
+    snapshot: dict[Path, tuple[int, int]] = {}
 
-        resolved = self._resolve_image_path(slide_data.image_path)
-        if resolved:
-            self._place_image(
-                slide, resolved,
-                Inches(2), Inches(2),
-                Inches(9.333), Inches(5)
-            )
-        else:
-            placeholder = slide.shapes.add_textbox(
-                Inches(2), Inches(3), Inches(9.333), Inches(2)
-            )
-            tf = placeholder.text_frame
-            p = tf.paragraphs[0]
-            p.text = f"[Image not found: {slide_data.image_path}]"
-            p.font.size = Pt(18)
-            p.font.color.rgb = Theme.TEXT_MUTED
-            p.alignment = PP_ALIGN.CENTER
+    try:
+        while True:
+            current = _snapshot(input_dir)
+            if current == snapshot:
+                time.sleep(interval)
+                continue
 
-        self._add_slide_footer(slide, chapter_title)
+            while True:
+                time.sleep(debounce)
+                settled = _snapshot(input_dir)
+                if settled == current:
+                    break
+                current = settled
 
-    PPTX_SUPPORTED_FORMATS = {".png", ".jpg", ".jpeg", ".gif", ".tiff", ".tif", ".bmp"}
+            changed = sorted(
+                path.name for path in current.keys() | snapshot.keys()
+                if current.get(path) != snapshot.get(path)
+            )
+            snapshot = current
 
-    def _place_image(self, slide, image_path: Path, left, top, max_width, max_height) -> None:
-        with PILImage.open(image_path) as img:
-            img_w, img_h = img.size
+            md_files = sorted(path for path in current if path.suffix == ".md")
+            if not md_files:
+                console.print(f"[red]No .md files found in {input_dir}[/red]")
+                continue
 
-        aspect = img_w / img_h
-        width = max_width
-        height = int(max_width / aspect)
-        if height > max_height:
-            height = max_height
-            width = int(max_height * aspect)
+            started = time.perf_counter()
+            try:
+                chapters = sorted(_parse_files(parser, md_files, cache=build_cache), key=lambda c: c.order)
+                assets = AssetIndex([images_dir])
+                _fetch_remote_images(assets, chapters, remote, quiet=True)
+                builder = PresentationBuilder(
+                    title=title, author=author, images_dir=images_dir, cache=build_cache, images=images,
+                    assets=assets, packaging=Packaging.preset(package),
+                )
+                builder.build(chapters, output)
+            except Exception as exc:
+                console.print(f"[red]Build failed: {exc}[/red]")
+                continue
+            finally:
+                build_cache.prune()
 
-        if image_path.suffix.lower() not in self.PPTX_SUPPORTED_FORMATS:
-            with PILImage.open(image_path) as img:
-                img = img.convert("RGBA")
-                tmp = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
-                img.save(tmp.name, "PNG")
-                image_path = Path(tmp.name)
+            elapsed = (time.perf_counter() - started) * 1000
+            summary = ", ".join(changed[:3]) + (f" (+{len(changed) - 3} more)" if len(changed) > 3 else "")
+            console.print(
+                f"[green]{datetime.now():%H:%M:%S} Saved: {output}[/green] "
+                f"[dim]{builder.slide_number} slides, {builder.rendered_chapters}/{len(chapters)} chapters "
+                f"rendered in {elapsed:.0f} ms ({summary})[/dim]"
+            )
+    except KeyboardInterrupt:
+        console.print("\n[dim]Stopped watching.[/dim]\n")
+    finally:
+        images.close()
+        _evict_cache(build_cache)
 
-        slide.shapes.add_picture(str(image_path), left, top, width=width, height=height)
 
-    def _resolve_image_path(self, raw_path: str) -> Optional[Path]:
-        path = Path(raw_path)
-        if path.exists():
-            return path
-        candidate = self.images_dir / path.name
-        if candidate.exists():
-            return candidate
-        return None
+@app.command("build-many")
+def build_many(
+    manifest: Path = typer.Argument(
+        ...,
+        help="JSON list of jobs: {\"input\", \"output\", \"title\", \"author\"}",
+        exists=True,
+        dir_okay=False,
+    ),
+    jobs: int = typer.Option(
+        0,
+        "--jobs", "-j",
+        min=0,
+        help="Worker processes, each building one deck at a time (0 = all cores)"
+    ),
+    cache: bool = typer.Option(
+        False,
+        "--cache/--no-cache",
+        help="Share parsed chapters and rendered slides between jobs and runs"
+    ),
+    cache_dir: Path = typer.Option(
+        Path(".pptx-cache"),
+        "--cache-dir",
+        help="Where the build cache lives"
+    ),
+):
+    """Builds many presentations from a manifest on a pool of warm worker processes."""
+    console.print(f"\n[bold blue]PPTX Batch Build[/bold blue]\n")
 
-    def _add_slide_header(self, slide, title: str) -> None:
-        line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0), Inches(0), Inches(13.333), Inches(0.08)
-        )
-        line.fill.solid()
-        line.fill.fore_color.rgb = Theme.ACCENT
-        line.line.fill.background()
+    try:
+        deck_jobs = _load_manifest(manifest)
+    except (ValueError, TypeError, json.JSONDecodeError) as e:
+        console.print(f"[red]Invalid manifest {manifest}: {e}[/red]")
+        raise typer.Exit(1)
 
-        title_box = slide.shapes.add_textbox(
-            Inches(0.5), Inches(0.3), Inches(12.333), Inches(1)
-        )
-        tf = title_box.text_frame
-        p = tf.paragraphs[0]
-        p.text = title
-        p.font.size = Theme.TITLE_SIZE
-        p.font.bold = True
-        p.font.color.rgb = Theme.PRIMARY
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    workers = min(jobs, len(deck_jobs)) or 1
+    console.print(f"[dim]{len(deck_jobs)} decks on {workers} workers[/dim]\n")
 
-    def _add_slide_footer(self, slide, chapter_title: str) -> None:
-        num_box = slide.shapes.add_textbox(
-            Inches(12.333), Inches(7), Inches(0.75), Inches(0.4)
-        )
-        tf = num_box.text_frame
-        p = tf.paragraphs[0]
-        p.text = f"{self.slide_number}"
-        p.font.size = Theme.FOOTER_SIZE
-        p.font.color.rgb = Theme.TEXT_MUTED
-        p.alignment = PP_ALIGN.RIGHT
+    start = time.perf_counter()
+    results: dict[Path, DeckResult] = {}
+    with tempfile.TemporaryDirectory(prefix="pptx-images-") as work_dir:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_warm_worker, initargs=(Path(work_dir),)
+        ) as executor, Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            console=console,
+        ) as progress:
+            task = progress.add_task("Building decks...", total=len(deck_jobs))
+            futures = [
+                executor.submit(_build_deck, job, cache_dir if cache else None, cache_dir / "remote")
+                for job in deck_jobs
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                results[result.output] = result
+                progress.update(task, advance=1, description=f"Built: {result.output.name}")
+    elapsed = time.perf_counter() - start
 
-        chapter_box = slide.shapes.add_textbox(
-            Inches(0.25), Inches(7), Inches(4), Inches(0.4)
+    table = Table(title="Decks")
+    table.add_column("Output")
+    table.add_column("Slides", justify="right")
+    table.add_column("Time (s)", justify="right")
+    table.add_column("Images", justify="right")
+    table.add_column("Status")
+    failed = 0
+    for job in deck_jobs:
+        result = results[job.output]
+        if result.error:
+            failed += 1
+            status = f"[red]{result.error}[/red]"
+        else:
+            status = "[green]ok[/green]"
+        table.add_row(
+            str(result.output), str(result.slides), f"{result.seconds:.2f}",
+            f"{result.image_hits} hits, {result.image_misses} misses", status,
         )
-        tf = chapter_box.text_frame
-        p = tf.paragraphs[0]
-        p.text = chapter_title
-        p.font.size = Theme.FOOTER_SIZE
-        p.font.color.rgb = Theme.TEXT_MUTED
+    console.print(table)
 
-    def _set_slide_background(self, slide, color: RGBColor) -> None:
-        background = slide.background
-        fill = background.fill
-        fill.solid()
-        fill.fore_color.rgb = color
+    total_slides = sum(result.slides for result in results.values())
+    console.print(
+        f"\n[bold]{len(deck_jobs) - failed}/{len(deck_jobs)} decks, {total_slides} slides "
+        f"in {elapsed:.2f}s ({total_slides / elapsed:.0f} slides/s)[/bold]\n"
+    )
+    if cache:
+        _evict_cache(BuildCache(cache_dir))
+    if failed:
+        raise typer.Exit(1)
 
 
 @app.command()
-def build(
+def thumbnails(
     input_dir: Path = typer.Argument(
         Path("markdown"),
         help="Folder containing markdown files",
@@ -568,10 +3944,10 @@ def build(
         file_okay=False,
         dir_okay=True,
     ),
-    output: Optional[Path] = typer.Option(
-        None,
+    output: Path = typer.Option(
+        Path("exports/thumbnails"),
         "--output", "-o",
-        help="Output file path (defaults to exports/<title>_<timestamp>.pptx)"
+        help="Folder for the slide PNGs and the contact sheet"
     ),
     title: str = typer.Option(
         "Presentation",
@@ -583,9 +3959,48 @@ def build(
         "--author", "-a",
         help="Presentation author"
     ),
+    width: int = typer.Option(
+        640,
+        "--width",
+        min=160,
+        help="Thumbnail width in pixels"
+    ),
+    columns: int = typer.Option(
+        6,
+        "--columns",
+        min=1,
+        help="Thumbnails per row on the contact sheet"
+    ),
+    max_lines: Optional[int] = typer.Option(
+        None,
+        "--max-lines",
+        min=1,
+        help="Most code lines or wrapped bullet lines per slide before continuing on a \"(cont.)\" slide"
+    ),
+    jobs: int = typer.Option(
+        1,
+        "--jobs", "-j",
+        min=0,
+        help="Number of worker processes for rendering (0 = all cores)"
+    ),
+    cache: bool = typer.Option(
+        True,
+        "--cache/--no-cache",
+        help="Reuse thumbnails of unchanged slides from previous runs"
+    ),
+    cache_dir: Path = typer.Option(
+        Path(".pptx-cache"),
+        "--cache-dir",
+        help="Folder for the thumbnail cache"
+    ),
+    image_roots: list[Path] = typer.Option(
+        [],
+        "--image-root",
+        help="Extra folder to look up images in after <input>/images (repeatable)"
+    ),
 ):
-    """Compiles Markdown files into a PowerPoint presentation."""
-    console.print(f"\n[bold blue]PPTX Presentation Generator[/bold blue]\n")
+    """Renders every slide to PNG plus a contact sheet, without PowerPoint or LibreOffice."""
+    console.print(f"\n[bold blue]Slide Thumbnails[/bold blue]\n")
 
     md_files = sorted(input_dir.glob("*.md"))
 
@@ -593,46 +4008,167 @@ def build(
         console.print(f"[red]No .md files found in {input_dir}[/red]")
         raise typer.Exit(1)
 
-    if output is None:
-        exports_dir = Path("exports")
-        exports_dir.mkdir(parents=True, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_title = re.sub(r'[^\w\s-]', '', title).strip().replace(' ', '_').lower()
-        output = exports_dir / f"{safe_title}_{timestamp}.pptx"
-    else:
-        output.parent.mkdir(parents=True, exist_ok=True)
-
-    console.print(f"[dim]Found {len(md_files)} markdown files[/dim]\n")
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
 
+    start = time.perf_counter()
+    assets = AssetIndex([input_dir / "images", *image_roots])
+    rasterizer = SlideRasterizer(title, author, width, assets, max_lines)
+    build_cache = BuildCache(cache_dir) if cache else BuildCache()
     parser = MarkdownParser()
-    chapters: list[Chapter] = []
+    chapters = sorted(_parse_files(parser, md_files, cache=build_cache if cache else None), key=lambda c: c.order)
+    _fetch_remote_images(assets, chapters, RemoteImageStore(cache_dir / "remote"))
+    chapters = [rasterizer.fit(chapter) for chapter in chapters]
 
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        console=console,
-    ) as progress:
-        task = progress.add_task("Parsing files...", total=len(md_files))
+    plan = [(None, [(SlideType.TITLE, None)])] + [(chapter, rasterizer.pages(chapter)) for chapter in chapters]
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        pending = []
+        for chapter, pages in plan:
+            keys = [rasterizer.key(chapter, *page, build_cache) for page in pages]
+            rendered = [build_cache.get(key) for key in keys]
+            missing = [i for i, png in enumerate(rendered) if png is None]
+            future = None
+            if executor is not None and chapter is not None and missing:
+                future = executor.submit(_render_thumbnails, (title, author, width, assets, chapter, missing))
+            pending.append((chapter, pages, keys, rendered, missing, future))
 
-        for md_file in md_files:
-            chapter = parser.parse_file(md_file)
-            chapters.append(chapter)
-            progress.update(task, advance=1, description=f"Parsing: {md_file.name}")
+        output.mkdir(parents=True, exist_ok=True)
+        manifest_path = output / ".thumbnails.json"
+        try:
+            previous = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            previous = {}
+        manifest: dict[str, str] = {}
+        tiles = []
+        rendered_count = 0
+        written = 0
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            console=console,
+        ) as progress:
+            task = progress.add_task("Rendering thumbnails...", total=len(pending))
+            for chapter, pages, keys, rendered, missing, future in pending:
+                if future is not None:
+                    fresh = future.result()
+                else:
+                    fresh = [rasterizer.render(chapter, *pages[i]) for i in missing]
+                for i, thumbnail in zip(missing, fresh):
+                    rendered[i] = thumbnail
+                    build_cache.put(keys[i], thumbnail)
+                rendered_count += len(missing)
 
-    chapters.sort(key=lambda c: c.order)
+                # A slide file is only rewritten when its content or its number changed.
+                for (slide_type, _), key, (png, tile) in zip(pages, keys, rendered):
+                    number = len(tiles) + 1
+                    name = f"slide-{number:03d}.png"
+                    manifest[name] = f"{key}:{number}"
+                    if previous.get(name) != manifest[name] or not (output / name).exists():
+                        rasterizer.stamp(png, number, slide_type).save(output / name, "PNG")
+                        written += 1
+                    tiles.append(tile)
+                progress.update(task, advance=1, description=f"Rendered: {chapter.title if chapter else title}")
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
-    console.print("\n[bold]Chapters:[/bold]")
-    for ch in chapters:
-        console.print(f"  {ch.order:02d}. {ch.title} ({len(ch.slides)} slides)")
+    for stale in output.glob("slide-*.png"):
+        if stale.name not in manifest:
+            stale.unlink()
+    manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+    sheet_path = output / "contact-sheet.png"
+    rasterizer.contact_sheet(tiles, columns).save(sheet_path, "PNG")
 
-    console.print(f"\n[dim]Generating presentation...[/dim]")
+    console.print(f"[green]Saved: {output}/slide-*.png ({len(tiles)} slides, {written} updated)[/green]")
+    console.print(f"[green]Saved: {sheet_path}[/green]")
+    console.print(
+        f"[dim]   Rendered {rendered_count}/{len(tiles)} slides, "
+        f"{len(tiles) - rendered_count} from cache, in {time.perf_counter() - start:.2f}s[/dim]"
+    )
+    _evict_cache(build_cache)
+    console.print()
 
-    images_dir = input_dir / "images"
-    builder = PresentationBuilder(title=title, author=author, images_dir=images_dir)
-    builder.build(chapters, output)
 
-    console.print(f"\n[green]Saved: {output}[/green]")
-    console.print(f"[dim]   Total slides: {builder.slide_number}[/dim]\n")
+@app.command()
+def bench(
+    chapters: int = typer.Option(10, "--chapters", min=1, help="Number of synthetic chapters"),
+    slides: int = typer.Option(50, "--slides", min=1, help="Slides per chapter"),
+    code_ratio: float = typer.Option(0.2, "--code-ratio", min=0.0, max=1.0, help="Share of code slides"),
+    image_ratio: float = typer.Option(0.1, "--image-ratio", min=0.0, max=1.0, help="Share of image slides"),
+    inline_density: float = typer.Option(
+        0.2, "--inline-density", min=0.0, max=1.0,
+        help="Share of words wrapped in `code`, **bold** or *italic*"
+    ),
+    seed: int = typer.Option(0, "--seed", help="Random seed for the synthetic corpus"),
+    output: Optional[Path] = typer.Option(
+        None,
+        "--output", "-o",
+        help="JSON results file (default: exports/bench_<timestamp>.json)"
+    ),
+    keep_corpus: Optional[Path] = typer.Option(
+        None,
+        "--keep-corpus",
+        help="Write the synthetic corpus and deck to this folder instead of a temporary one"
+    ),
+):
+    """Benchmarks parsing, rendering and saving on a synthetic deck."""
+    console.print(f"\n[bold blue]Benchmark[/bold blue]\n")
+
+    if code_ratio + image_ratio > 1:
+        console.print("[red]--code-ratio and --image-ratio must add up to at most 1[/red]")
+        raise typer.Exit(1)
+
+    output = _prepare_output(output, "bench", suffix=".json")
+    params = {
+        "chapters": chapters,
+        "slides": slides,
+        "code_ratio": code_ratio,
+        "image_ratio": image_ratio,
+        "inline_density": inline_density,
+        "seed": seed,
+    }
+
+    with tempfile.TemporaryDirectory(prefix="pptx-bench-") as tmp:
+        corpus_dir = keep_corpus or Path(tmp)
+        corpus_dir.mkdir(parents=True, exist_ok=True)
+        _generate_corpus(corpus_dir, **params)
+        console.print(f"[dim]Generated {chapters} chapters x {slides} slides in {corpus_dir}[/dim]\n")
+        startup_ms = _measure_startup(corpus_dir)
+        results = _run_bench(corpus_dir, corpus_dir / "bench.pptx")
+
+    report = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "params": params,
+        "startup_ms": startup_ms,
+        **results,
+    }
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    table = Table(title="Stages")
+    table.add_column("Stage")
+    table.add_column("Calls", justify="right")
+    table.add_column("Total (s)", justify="right")
+    table.add_column("Mean (ms)", justify="right")
+    for label, stage in results["stages"].items():
+        table.add_row(label, str(stage["calls"]), f"{stage['seconds']:.3f}", f"{stage['mean_ms']:.2f}")
+    console.print(table)
+
+    console.print(f"\n[bold]{results['slides']} slides in {results['seconds']:.2f}s "
+                  f"({results['slides_per_second']:.0f} slides/s)[/bold]")
+    if results["peak_memory_bytes"] is not None:
+        console.print(f"[dim]   Peak memory: {results['peak_memory_bytes'] / 1024 / 1024:.1f} MB[/dim]")
+    console.print(f"[dim]   Parsed model: {results['model_bytes_per_slide']:.0f} bytes per slide[/dim]")
+    console.print(f"[dim]   Output size: {results['output_bytes'] / 1024:.1f} KB[/dim]")
+    for mode, packaged in results["packaging"].items():
+        console.print(
+            f"[dim]   Package {mode}: {packaged['bytes'] / 1024:.1f} KB in {packaged['seconds'] * 1000:.0f} ms[/dim]"
+        )
+    console.print(f"[dim]   Startup: --help {startup_ms['help']:.0f} ms, preview {startup_ms['preview']:.0f} ms[/dim]")
+    console.print(f"\n[green]Saved: {output}[/green]\n")
 
 
 @app.command()
@@ -642,6 +4178,27 @@ def preview(
         help="Folder containing markdown files",
         exists=True,
     ),
+    image_roots: list[Path] = typer.Option(
+        [],
+        "--image-root",
+        help="Extra folder to look up images in after <input>/images (repeatable)"
+    ),
+    strict: bool = typer.Option(
+        False,
+        "--strict",
+        help="Exit with an error if any referenced image is missing"
+    ),
+    max_lines: Optional[int] = typer.Option(
+        None,
+        "--max-lines",
+        min=1,
+        help="Most code lines or wrapped bullet lines per slide before continuing on a \"(cont.)\" slide"
+    ),
+    cache_dir: Path = typer.Option(
+        Path(".pptx-cache"),
+        "--cache-dir",
+        help="Folder holding the build cache and downloaded http(s) images"
+    ),
 ):
     """Shows a preview of the presentation structure without generating a file."""
     console.print(f"\n[bold blue]Presentation Preview[/bold blue]\n")
@@ -653,10 +4210,17 @@ def preview(
         raise typer.Exit(1)
 
     parser = MarkdownParser()
+    fitter = TextFitter(max_lines)
+    assets = AssetIndex([input_dir / "images", *image_roots])
+    remote = RemoteImageStore(cache_dir / "remote", offline=True)
+    chapters = []
     total_slides = 1
+    overflows = 0
 
     for md_file in md_files:
         chapter = parser.parse_file(md_file)
+        chapters.append(chapter)
+        _fetch_remote_images(assets, [chapter], remote, quiet=True)
 
         console.print(f"\n[bold cyan]Chapter {chapter.order}: {chapter.title}[/bold cyan]")
         if chapter.agenda:
@@ -666,17 +4230,35 @@ def preview(
         if chapter.agenda:
             total_slides += 1
 
-        for slide in chapter.slides:
+        for slide in fitter.split(chapter.slides, assets.resolve):
             type_icon = {
                 SlideType.CONTENT: "[cyan]TXT[/cyan]",
                 SlideType.CODE: "[green]CODE[/green]",
                 SlideType.IMAGE: "[yellow]IMG[/yellow]",
             }.get(slide.slide_type, "[dim]---[/dim]")
 
-            console.print(f"    {type_icon} {slide.title or '(no title)'}")
+            fit = fitter.fit_slide(slide, side_image=bool(slide.content and slide.image_path and assets.resolve(slide.image_path)))
+            note = ""
+            if fit is not None and fit.overflow:
+                note = f" [red]overflows at {fit.size}pt[/red]"
+                overflows += 1
+            elif fit is not None and fit.size < (Theme.CODE_SIZE if slide.slide_type == SlideType.CODE else Theme.BODY_SIZE):
+                note = f" [yellow]shrunk to {fit.size}pt[/yellow]"
+
+            console.print(f"    {type_icon} {slide.title or '(no title)'}{note}")
             total_slides += 1
 
-    console.print(f"\n[bold]Total slides: {total_slides}[/bold]\n")
+    console.print(f"\n[bold]Total slides: {total_slides}[/bold]")
+    if overflows:
+        console.print(f"[red]Overflowing slides: {overflows}[/red]")
+    console.print()
+
+    missing, unused = assets.check(chapters)
+    if missing or unused or assets.duplicates:
+        _print_assets(assets, missing, unused)
+        console.print()
+    if strict and missing:
+        raise typer.Exit(1)
 
 
 if __name__ == "__main__":
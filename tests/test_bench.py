@@ -0,0 +1,14 @@
+from typer.testing import CliRunner
+
+from generator import DeckWriter, app
+
+
+def test_bench_restores_deck_writer(tmp_path):
+    methods = (DeckWriter.add, DeckWriter.close)
+    corpus = tmp_path / "corpus"
+    result = CliRunner().invoke(app, [
+        "bench", "--chapters", "1", "--slides", "3", "--keep-corpus", str(corpus), "-o", str(tmp_path / "bench.json"),
+    ])
+
+    assert result.exit_code == 0, result.output
+    assert (DeckWriter.add, DeckWriter.close) == methods
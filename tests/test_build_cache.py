@@ -0,0 +1,44 @@
+import os
+import time
+
+import generator
+from generator import BuildCache
+
+
+def test_key_follows_the_code(monkeypatch):
+    key = BuildCache.key("render", "chapter")
+
+    monkeypatch.setattr(generator, "_code_fingerprint", lambda: "edited")
+
+    assert BuildCache.key("render", "chapter") != key
+
+
+def _entry(cache: BuildCache, name: str, size: int, age: float) -> None:
+    cache.put(name, b"x" * size)
+    stamp = time.time() - age
+    os.utime(cache.cache_dir / f"{name}.pkl", (stamp, stamp))
+
+
+def test_evict_drops_old_entries(tmp_path):
+    cache = BuildCache(tmp_path)
+    _entry(cache, "fresh", 100, age=60)
+    _entry(cache, "stale", 100, age=40 * 86400)
+
+    removed, _ = cache.evict()
+
+    assert removed == 1
+    assert sorted(path.stem for path in tmp_path.glob("*.pkl")) == ["fresh"]
+
+
+def test_evict_keeps_recently_used_entries_within_size(tmp_path):
+    cache = BuildCache(tmp_path)
+    _entry(cache, "oldest", 1000, age=300)
+    _entry(cache, "older", 1000, age=200)
+    _entry(cache, "newest", 1000, age=100)
+    size = (tmp_path / "oldest.pkl").stat().st_size
+
+    assert BuildCache(tmp_path).get("oldest") == b"x" * 1000
+    removed, freed = cache.evict(max_bytes=2 * size)
+
+    assert (removed, freed) == (1, size)
+    assert sorted(path.stem for path in tmp_path.glob("*.pkl")) == ["newest", "oldest"]
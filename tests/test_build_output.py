@@ -0,0 +1,43 @@
+import pytest
+from typer.testing import CliRunner
+
+from generator import Renderer, app
+
+runner = CliRunner()
+
+
+def test_deck_is_written_to_output_as_given(tmp_path):
+    source = tmp_path / "md"
+    source.mkdir()
+    (source / "01_intro.md").write_text("# Hello\n- world\n", encoding="utf-8")
+    output = tmp_path / "out" / "deck"
+    output.parent.mkdir()
+
+    result = runner.invoke(app, ["build", str(source), "-o", str(output), "--format", "pptx,html"])
+
+    assert result.exit_code == 0, result.output
+    assert output.is_file()
+    assert (tmp_path / "out" / "deck.html").is_file()
+    assert not (tmp_path / "out" / "deck.pptx").exists()
+
+
+def test_renderer_requires_build():
+    class Incomplete(Renderer):
+        SUFFIX = ".txt"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_colliding_format_paths_are_rejected_before_rendering(tmp_path):
+    source = tmp_path / "md"
+    source.mkdir()
+    (source / "01_intro.md").write_text("# Hello\n- world\n", encoding="utf-8")
+    output = tmp_path / "col" / "deck.html"
+
+    result = runner.invoke(app, ["build", str(source), "-o", str(output), "--format", "pptx,html"])
+
+    assert result.exit_code == 1
+    assert "would write both" in result.output
+    assert list(output.parent.iterdir()) == []
+
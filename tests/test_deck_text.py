@@ -0,0 +1,61 @@
+import pytest
+from pptx import Presentation
+from typer.testing import CliRunner
+
+from generator import Chapter, ContentSlide, HtmlRenderer, PresentationBuilder, app, parse_inline
+
+runner = CliRunner()
+
+
+def _build(tmp_path, chapters: dict[str, str], *args: str) -> list[list[str]]:
+    source = tmp_path / "md"
+    source.mkdir()
+    for name, text in chapters.items():
+        (source / name).write_text(text, encoding="utf-8")
+    output = tmp_path / "deck.pptx"
+    result = runner.invoke(app, ["build", str(source), "-o", str(output), *args])
+    assert result.exit_code == 0, result.output
+    return [
+        [shape.text_frame.text for shape in slide.shapes if shape.has_text_frame]
+        for slide in Presentation(str(output)).slides
+    ]
+
+
+def test_slide_number_ignores_matching_bullet_text(tmp_path):
+    slides = _build(tmp_path, {"01_a.md": '# Fields\n- set name="Slide Number" on the field\n- second bullet\n'})
+
+    assert slides[2] == ["Fields", '• set name="Slide Number" on the field\n• second bullet', "3", "A"]
+
+
+@pytest.mark.parametrize("args", [(), ("--stream",), ("--jobs", "2")])
+def test_reused_slide_footer_ignores_matching_bullet_text(tmp_path, args):
+    slide = '# Shared\n- tag it name="Footer" here\n- keep this bullet\n'
+    slides = _build(tmp_path, {
+        "01_first.md": "---\ntitle: Chapter 1 title\n---\n" + slide,
+        "02_second.md": "---\ntitle: Chapter 2 title\n---\n" + slide,
+    }, *args)
+
+    bullets = '• tag it name="Footer" here\n• keep this bullet'
+    assert slides[2] == ["Shared", bullets, "3", "Chapter 1 title"]
+    assert slides[4] == ["Shared", bullets, "5", "Chapter 2 title"]
+
+
+def test_content_slide_without_spans_keeps_its_bullets():
+    slide = ContentSlide(title="X", content=("hello", "**world**"))
+
+    assert slide.spans == (parse_inline("hello"), parse_inline("**world**"))
+
+
+def test_content_slide_without_spans_renders_in_every_format(tmp_path):
+    chapter = Chapter(order=1, filename="01_ch.md", title="Ch", agenda="", slides=[
+        ContentSlide(title="X", content=("hello", "world")),
+    ])
+    deck, page = tmp_path / "deck.pptx", tmp_path / "deck.html"
+
+    PresentationBuilder(title="T").build([chapter], deck)
+    HtmlRenderer(title="T").build([chapter], page)
+
+    texts = [shape.text_frame.text for shape in Presentation(str(deck)).slides[2].shapes if shape.has_text_frame]
+    assert texts == ["X", "• hello\n• world", "3", "Ch"]
+    assert "hello" in page.read_text(encoding="utf-8")
+    assert "world" in page.read_text(encoding="utf-8")
@@ -0,0 +1,160 @@
+import random
+import re
+
+import pytest
+
+from generator import MarkdownParser
+
+# The regex cascade the line tokenizer replaced, kept as the reference for the differential tests.
+LEGACY_FRONTMATTER = re.compile(r'^---\s*\n(.*?)\n---\s*\n', re.DOTALL)
+LEGACY_SEPARATOR = re.compile(r'\n---\s*\n')
+LEGACY_CODE_BLOCK = re.compile(r'```(\w*)\n(.*?)```', re.DOTALL)
+LEGACY_IMAGE = re.compile(r'!\[([^\]]*)\]\(([^)]+)\)')
+LEGACY_HEADING = re.compile(r'^(#{1,3})\s+(.+)$', re.MULTILINE)
+LEGACY_LIST_ITEM = re.compile(r'^[\s]*[-*+]\s+(.+)$', re.MULTILINE)
+
+
+def _legacy_parse(text: str, fallback_title: str = "Doc") -> tuple[str, str, list[tuple]]:
+    title = agenda = ""
+    match = LEGACY_FRONTMATTER.match(text)
+    if match:
+        text = text[match.end():]
+        for line in match.group(1).split("\n"):
+            if ":" in line:
+                key, value = line.split(":", 1)
+                key, value = key.strip().lower(), value.strip().strip("\"'")
+                if key == "title":
+                    title = value
+                elif key == "agenda":
+                    agenda = value
+
+    def heading(section: str) -> str:
+        match = LEGACY_HEADING.search(section)
+        return match.group(2).strip() if match else ""
+
+    def items(section: str) -> list[str]:
+        return [item.strip() for item in LEGACY_LIST_ITEM.findall(section)]
+
+    slides = []
+    for section in LEGACY_SEPARATOR.split(text):
+        section = section.strip()
+        if not section:
+            continue
+        code = LEGACY_CODE_BLOCK.search(section)
+        image = LEGACY_IMAGE.search(section)
+        if code:
+            before = items(section[:code.start()].strip())
+            slides.append(("CODE", heading(section), before, code.group(2).strip(), code.group(1) or "text", ""))
+        elif image and items(section[:image.start()] + section[image.end():]):
+            remaining = items(section[:image.start()] + section[image.end():])
+            slides.append(("CONTENT", heading(section), remaining, "", "", image.group(2)))
+        elif image:
+            slides.append(("IMAGE", heading(section), [], "", "", image.group(2)))
+        else:
+            content = items(section)
+            if not content:
+                text_only = LEGACY_HEADING.sub("", section).strip()
+                content = [text_only] if text_only else []
+            slides.append(("CONTENT", heading(section), content, "", "", ""))
+    return title or fallback_title, agenda, slides
+
+
+def _parse(tmp_path, text: str) -> tuple[str, str, list[tuple]]:
+    path = tmp_path / "01_doc.md"
+    path.write_text(text, encoding="utf-8")
+    chapter = MarkdownParser().parse_file(path)
+    slides = [
+        (s.slide_type.name, s.title, list(s.content), s.code, s.code_language, s.image_path)
+        for s in chapter.slides
+    ]
+    return chapter.title, chapter.agenda, slides
+
+
+LINES = [
+    "# Title {n}", "## Sub {n}", "#### deep {n}", "- item {n}", "* star `code` {n}", "  + nested **b** {n}",
+    "plain text {n}", "  indented {n}", "- trailing {n}  ", "#  spaced {n}\t", "", "![alt](img{n}.png)",
+    "- with image ![](p{n}.png)",
+    "```js\nlet a = {n};\n- not item\n```", "```\ncode {n}\n```",
+]
+
+
+def _document(rng: random.Random) -> str:
+    sections = []
+    for _ in range(rng.randint(1, 8)):
+        lines = [rng.choice(LINES).format(n=rng.randint(0, 99)) for _ in range(rng.randint(0, 6))]
+        # Every section needs visible text: blank sections make doubled separators, covered separately below.
+        lines.append(f"text {rng.randint(0, 99)}")
+        rng.shuffle(lines)
+        sections.append("\n".join(lines))
+    if rng.random() < 0.3:
+        # An unclosed fence is plain text; one that a later section closes is code, covered separately below.
+        index = rng.randrange(len(sections))
+        if not any("```" in section for section in sections[index + 1:]):
+            sections[index] += f"\n```py\nopen {rng.randint(0, 99)}"
+    frontmatter = "---\ntitle: T\nagenda: A: b\n---\n" if rng.random() < 0.7 else ""
+    return frontmatter + "\n---\n\n".join(sections)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_tokenizer_matches_legacy_parser(tmp_path, seed):
+    rng = random.Random(seed)
+    for _ in range(250):
+        text = _document(rng)
+        assert _parse(tmp_path, text) == _legacy_parse(text), text
+
+
+def test_doubled_separator_drops_stray_rule(tmp_path):
+    text = "# A\n- a\n---\n---\n# B\n"
+
+    assert _legacy_parse(text)[2][1] == ("CONTENT", "B", ["---"], "", "", "")
+    assert _parse(tmp_path, text)[2][1] == ("CONTENT", "B", [], "", "", "")
+
+
+def test_unclosed_fence_keeps_later_slides(tmp_path):
+    text = "# B\n```python\nx=1\n---\n# C\n- c\n"
+
+    assert _parse(tmp_path, text) == _legacy_parse(text)
+    assert [slide[1] for slide in _parse(tmp_path, text)[2]] == ["B", "C"]
+
+
+def test_closed_fence_keeps_separator_as_code(tmp_path):
+    text = "# B\n```yaml\na: 1\n---\nb: 2\n```\n---\n# C\n- c\n"
+
+    assert _parse(tmp_path, text)[2] == [
+        ("CODE", "B", [], "a: 1\n---\nb: 2", "yaml", ""),
+        ("CONTENT", "C", ["c"], "", "", ""),
+    ]
+
+
+def test_image_only_bullet_does_not_swallow_next_line(tmp_path):
+    # The legacy "\s+" after the bullet marker ran past the removed image into the following line.
+    text = "# T\n- ![i](a.png)\nplain line\n- b\n"
+
+    assert _legacy_parse(text)[2] == [("CONTENT", "T", ["plain line", "b"], "", "", "a.png")]
+    assert _parse(tmp_path, text)[2] == [("CONTENT", "T", ["b"], "", "", "a.png")]
+
+    text = "# T\n- ![i](a.png)\n- b\n"
+
+    assert _legacy_parse(text)[2] == [("CONTENT", "T", ["- b"], "", "", "a.png")]
+    assert _parse(tmp_path, text)[2] == [("CONTENT", "T", ["b"], "", "", "a.png")]
+
+MAPPED_SOURCES = [
+    "---\ntitle: Mapped\n---\n# One\n- a\n---\n# Two\n```py\n---\nprint()\n```\n- b\n",
+    "# CRLF\r\n- a\r\n---\r\n# Next\r\n- b",
+    "# Lone CR\r- a\r---\r# Next\r- b\r",
+    "- ünïcode bullet\n---x\n----\n--- \n# Tail",
+]
+
+
+@pytest.mark.parametrize("text", MAPPED_SOURCES)
+def test_mapped_source_matches_buffered_reader(tmp_path, monkeypatch, text):
+    path = tmp_path / "01_mapped.md"
+    path.write_bytes(text.encode("utf-8"))
+    parser = MarkdownParser()
+    monkeypatch.setattr(MarkdownParser, "MAP_THRESHOLD", 1)
+    monkeypatch.setattr(MarkdownParser, "MAP_WINDOW", 8)
+
+    with parser.open_chapter(path, mapped=True) as (chapter, slides):
+        chapter.slides = list(slides)
+
+    assert chapter == parser.parse_file(path)
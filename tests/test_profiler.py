@@ -0,0 +1,37 @@
+import json
+
+from typer.testing import CliRunner
+
+from generator import Profiler, app
+
+
+def test_span_records_blocks_kept_below_the_peak():
+    profiler = Profiler()
+    kept = []
+    with profiler.span("warm", "render"):
+        [object() for _ in range(50000)]
+    with profiler.span("keep", "render"):
+        kept.extend(object() for _ in range(20000))
+    with profiler.span("free", "render"):
+        kept.clear()
+
+    warm, keep, free = profiler.events
+    assert keep.block_growth > 15000
+    assert free.block_growth < -15000
+    assert profiler.totals()["keep"]["block_growth"] == keep.block_growth
+
+
+def test_profile_tables_and_trace_show_block_growth(tmp_path):
+    source = tmp_path / "md"
+    source.mkdir()
+    (source / "01_intro.md").write_text("# Hello\n- world\n---\n# Again\n- there\n", encoding="utf-8")
+    trace = tmp_path / "trace.json"
+
+    result = CliRunner().invoke(app, [
+        "build", str(source), "-o", str(tmp_path / "deck.pptx"), "--trace", str(trace),
+    ])
+
+    assert result.exit_code == 0, result.output
+    assert result.output.count("Blocks") >= 3
+    events = json.loads(trace.read_text(encoding="utf-8"))["traceEvents"]
+    assert all(isinstance(event["args"]["block_growth"], int) for event in events)
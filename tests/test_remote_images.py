@@ -0,0 +1,232 @@
+import hashlib
+import io
+import threading
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+from typer.testing import CliRunner
+
+import generator
+from generator import AssetIndex, RemoteImageStore, _fetch_streamed_remote_images, app
+
+
+def _png(color: tuple[int, int, int]) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (400, 300), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class _ImageServer(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _ImageHandler)
+        self.images = {"/blue.png": _png((20, 100, 200)), "/red.png": _png((200, 50, 50))}
+        self.requests: list[tuple[str, int]] = []
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+
+class _ImageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        body = self.server.images.get(self.path)
+        etag = f'"{hashlib.md5(body).hexdigest()}"' if body is not None else None
+        if body is None:
+            status, body = 404, b""
+        elif self.headers.get("If-None-Match") == etag:
+            status, body = 304, b""
+        else:
+            status = 200
+        self.server.requests.append((self.path, status))
+
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        if status == 200:
+            self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    server = _ImageServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_fresh_fetch_stores_content_addressed_copy(tmp_path, server):
+    store = RemoteImageStore(tmp_path / "remote")
+    url = server.url("/blue.png")
+
+    paths = store.fetch([url, url])
+
+    assert paths[url].read_bytes() == server.images["/blue.png"]
+    assert paths[url].name == hashlib.sha256(server.images["/blue.png"]).hexdigest() + ".png"
+    assert store.downloaded == 1
+    assert server.requests == [("/blue.png", 200)]
+
+
+def test_repeat_fetch_within_ttl_makes_no_requests(tmp_path, server):
+    url = server.url("/blue.png")
+    RemoteImageStore(tmp_path / "remote").fetch([url])
+    server.requests.clear()
+
+    store = RemoteImageStore(tmp_path / "remote")
+    paths = store.fetch([url])
+
+    assert url in paths
+    assert store.fresh == 1
+    assert server.requests == []
+
+
+def test_expired_copy_is_revalidated_with_304(tmp_path, server):
+    url = server.url("/blue.png")
+    first = RemoteImageStore(tmp_path / "remote").fetch([url])[url]
+    server.requests.clear()
+
+    store = RemoteImageStore(tmp_path / "remote", ttl=0)
+    paths = store.fetch([url])
+
+    assert paths[url] == first
+    assert store.revalidated == 1
+    assert store.downloaded == 0
+    assert server.requests == [("/blue.png", 304)]
+
+
+def test_offline_reuses_stored_copies_only(tmp_path, server):
+    stored, missing = server.url("/blue.png"), server.url("/red.png")
+    RemoteImageStore(tmp_path / "remote").fetch([stored])
+    server.requests.clear()
+
+    paths = RemoteImageStore(tmp_path / "remote", ttl=0, offline=True).fetch([stored, missing])
+
+    assert list(paths) == [stored]
+    assert server.requests == []
+
+
+def test_missing_image_is_reported_as_failed(tmp_path, server):
+    url = server.url("/missing.png")
+    store = RemoteImageStore(tmp_path / "remote")
+
+    paths = store.fetch([url])
+
+    assert paths == {}
+    assert store.failed == {url: "HTTP 404"}
+
+
+def test_server_error_keeps_last_good_copy(tmp_path, server):
+    url = server.url("/blue.png")
+    first = RemoteImageStore(tmp_path / "remote").fetch([url])[url]
+    del server.images["/blue.png"]
+
+    store = RemoteImageStore(tmp_path / "remote", ttl=0)
+    paths = store.fetch([url])
+
+    assert paths[url] == first
+    assert store.failed == {url: "HTTP 404"}
+
+
+def test_concurrent_stores_keep_each_others_entries(tmp_path, server):
+    blue, red = server.url("/blue.png"), server.url("/red.png")
+    first = RemoteImageStore(tmp_path / "remote")
+    second = RemoteImageStore(tmp_path / "remote")
+    first.fetch([blue])
+    second.fetch([red])
+    server.requests.clear()
+
+    store = RemoteImageStore(tmp_path / "remote")
+    store.fetch([blue, red])
+
+    assert store.fresh == 2
+    assert server.requests == []
+
+
+def test_thumbnails_paginate_with_remote_side_image(tmp_path, server):
+    source = tmp_path / "md"
+    source.mkdir()
+    bullets = "".join(
+        f"- bullet {number} with a fairly long line of words that wraps once it is narrowed by an image\n"
+        for number in range(14)
+    )
+    (source / "01_side.md").write_text(f"# Side\n![]({server.url('/blue.png')})\n{bullets}", encoding="utf-8")
+    runner = CliRunner()
+
+    build = runner.invoke(app, [
+        "build", str(source), "-o", str(tmp_path / "deck.pptx"), "--cache-dir", str(tmp_path / "cache"),
+    ])
+    thumbnails = runner.invoke(app, [
+        "thumbnails", str(source), "-o", str(tmp_path / "thumbs"), "--cache-dir", str(tmp_path / "cache"),
+    ])
+
+    assert build.exit_code == 0, build.output
+    assert thumbnails.exit_code == 0, thumbnails.output
+    assert "Total slides: 5" in build.output
+    assert len(list((tmp_path / "thumbs").glob("slide-*.png"))) == 5
+
+
+def test_streaming_url_scan_does_not_grow_with_the_file(tmp_path, server):
+    def scan_peak(count: int) -> int:
+        slides = "".join(f"# Slide {number}\n- first point {number}\n- second point {number}\n---\n" for number in range(count))
+        source = tmp_path / f"01_slides_{count}.md"
+        source.write_text(f"{slides}# Remote\n![]({server.url('/blue.png')})\n", encoding="utf-8")
+        assets = AssetIndex([tmp_path / "images"])
+        tracemalloc.start()
+        try:
+            _fetch_streamed_remote_images(assets, [source], RemoteImageStore(tmp_path / "remote"))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert assets.resolve(server.url("/blue.png")) is not None
+        return peak
+
+    scan_peak(100)
+    small, large = scan_peak(5000), scan_peak(20000)
+
+    assert large < small * 1.5
+
+
+def test_streaming_url_scan_skips_fetch_without_remote_images(tmp_path, server):
+    source = tmp_path / "01_local.md"
+    source.write_text("# Local\n![](local.png)\n", encoding="utf-8")
+
+    _fetch_streamed_remote_images(AssetIndex([tmp_path / "images"]), [source], RemoteImageStore(tmp_path / "remote"))
+
+    assert server.requests == []
+    assert not (tmp_path / "remote").exists()
+
+
+def test_watch_keeps_its_caches_under_cache_dir(tmp_path, server, monkeypatch):
+    source = tmp_path / "md"
+    source.mkdir()
+    (source / "01_remote.md").write_text(f"# Remote\n![]({server.url('/blue.png')})\n- point\n", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    sleeps = []
+
+    def sleep(seconds: float) -> None:
+        # The first sleep is the debounce before the first build; the next one ends the watch.
+        sleeps.append(seconds)
+        if len(sleeps) > 1:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(generator.time, "sleep", sleep)
+
+    result = CliRunner().invoke(app, [
+        "watch", str(source), "-o", str(tmp_path / "deck.pptx"), "--cache-dir", str(tmp_path / "cache"),
+    ])
+
+    assert result.exit_code == 0, result.output
+    assert "Saved:" in result.output
+    assert list((tmp_path / "cache").glob("*.pkl"))
+    assert any((tmp_path / "cache" / "remote").rglob("*.png"))
+    assert not (tmp_path / ".pptx-cache").exists()
@@ -0,0 +1,36 @@
+import pytest
+
+from generator import CodeSlide, ContentSlide, TextFitter
+
+
+def test_fit_caches_stay_bounded():
+    fitter = TextFitter()
+
+    for number in range(TextFitter.FIT_CACHE_SIZE * 2):
+        fitter.fit_bullets((f"bullet {number}", "another bullet"))
+        fitter.fit_code(f"print({number})")
+
+    assert len(fitter._fits) == TextFitter.FIT_CACHE_SIZE
+    assert len(fitter._words) <= TextFitter.WORD_CACHE_SIZE
+
+
+def test_fit_cache_keeps_recently_used_entries():
+    fitter = TextFitter()
+    first = fitter.fit_code("print(0)")
+
+    for number in range(1, TextFitter.FIT_CACHE_SIZE * 2):
+        assert fitter.fit_code("print(0)") is first
+        fitter.fit_code(f"print({number})")
+
+
+@pytest.mark.parametrize("title, continued", [("Loop", "Loop (cont.)"), ("", "(cont.)")])
+def test_continuation_titles(title, continued):
+    fitter = TextFitter()
+    code = CodeSlide(title=title, code="\n".join(f"line {number}" for number in range(200)))
+    bullets = ContentSlide(title=title, content=tuple(f"bullet {number}" for number in range(60)))
+
+    for slide in (code, bullets):
+        titles = [page.title for page in fitter.split([slide])]
+        assert len(titles) > 1
+        assert titles[0] == title
+        assert set(titles[1:]) == {continued}